@@ -0,0 +1,56 @@
+import sys
+import time
+
+from booster import Booster
+from catalog import get_catalog
+from constants import BALANCE_BATCH, SUPPORTED_FORMATS
+
+
+PACKS = 2000
+
+
+def balance_metrics(mtg_set, packs=PACKS, batch=BALANCE_BATCH):
+    catalog = get_catalog(mtg_set)
+    booster_info = catalog.booster_info
+
+    samplers = []
+    for sheet, sheet_info in booster_info['sheets'].items():
+        if sheet_info.get('balanceColors'):
+            sampler = catalog.sheet_sampler(sheet)
+            sampler.balance_attempts = 0
+            sampler.balanced_packs = 0
+
+            size = max(b['contents'].get(sheet, 0) for b in booster_info['boosters'])
+            samplers.append((sheet, sampler, size))
+
+    results = []
+    for sheet, sampler, size in samplers:
+        start = time.perf_counter()
+        for _ in range(packs):
+            sampler.sample_balanced_indices(size, batch=batch)
+        elapsed = time.perf_counter() - start
+
+        results.append((sheet, sampler.balance_attempts / sampler.balanced_packs,
+                        elapsed / packs))
+
+    return results
+
+
+if __name__ == '__main__':
+    mtg_sets = list(SUPPORTED_FORMATS)
+    if len(sys.argv) > 1:
+        mtg_sets = [mtg_set.upper() for mtg_set in sys.argv[1:]]
+
+    print(f'{"set":<6}{"sheet":<12}{"attempts":>10}{"batch=1 us":>12}{f"batch={BALANCE_BATCH} us":>14}{"booster us":>12}')
+    for mtg_set in mtg_sets:
+        single = balance_metrics(mtg_set, batch=1)
+        batched = balance_metrics(mtg_set)
+
+        start = time.perf_counter()
+        for _ in range(PACKS):
+            Booster(mtg_set)
+        booster_time = (time.perf_counter() - start) / PACKS
+
+        for (sheet, attempts, single_time), (_, _, batched_time) in zip(single, batched):
+            print(f'{mtg_set:<6}{sheet:<12}{attempts:>10.2f}{single_time * 1e6:>12.1f}'
+                  f'{batched_time * 1e6:>14.1f}{booster_time * 1e6:>12.1f}')
@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+from booster import Booster
+from engine import Pod, RandomAdapter
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+async def run_pod(mtg_set, pod_packs, rng):
+    pod = Pod(mtg_set)
+    adapters = []
+    for seat_id in range(len(pod_packs)):
+        adapter = RandomAdapter(rng)
+        pod.add_seat(seat_id, adapter)
+        adapters.append(adapter)
+
+    await pod.run(pod_packs)
+
+    return adapters
+
+async def run_batch(mtg_set, pods, seats, rng):
+    batch_packs = [Booster.generate_pod(mtg_set, seats) for _ in range(pods)]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[run_pod(mtg_set, pod_packs, rng)
+                                     for pod_packs in batch_packs])
+    elapsed = time.perf_counter() - start
+
+    return [adapter for adapters in results for adapter in adapters], elapsed
+
+async def simulate(mtg_set, pods, seats, concurrency, seed):
+    rng = random.Random(seed)
+
+    # The first batch runs under tracemalloc to size a pod; the rest are timed clean.
+    tracemalloc.start()
+    await run_batch(mtg_set, min(concurrency, pods), seats, rng)
+    pod_bytes = tracemalloc.get_traced_memory()[1] / min(concurrency, pods)
+    tracemalloc.stop()
+
+    elapsed = 0.0
+    adapters = []
+    remaining = pods
+    while remaining > 0:
+        batch_adapters, batch_elapsed = await run_batch(mtg_set, min(concurrency, remaining), seats, rng)
+        adapters += batch_adapters
+        elapsed += batch_elapsed
+        remaining -= concurrency
+
+    pick_times = [t for adapter in adapters for t in adapter.pick_times]
+    display_times = [t for adapter in adapters for t in adapter.display_times]
+
+    print(f'{mtg_set}: {pods} pods x {seats} seats, {len(pick_times)} picks in {elapsed:.2f}s '
+          f'({len(pick_times) / elapsed:.0f} picks/s)')
+    print(f'    pick latency p50 {percentile(pick_times, 0.5) * 1e6:.0f}us, '
+          f'p99 {percentile(pick_times, 0.99) * 1e6:.0f}us')
+    print(f'    pass-to-display p50 {percentile(display_times, 0.5) * 1e6:.0f}us, '
+          f'p99 {percentile(display_times, 0.99) * 1e6:.0f}us')
+    print(f'    ~{pod_bytes / 1024:.0f} KiB peak traced memory per pod')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate bot-only drafts with the headless engine.')
+    parser.add_argument('sets', nargs='*', default=['CMR', 'ZNR', '2XM'])
+    parser.add_argument('--pods', type=int, default=1000)
+    parser.add_argument('--seats', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    for mtg_set in args.sets:
+        asyncio.run(simulate(mtg_set.upper(), args.pods, args.seats, args.concurrency, args.seed))
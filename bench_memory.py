@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import gc
+import multiprocessing
+import random
+
+from booster import Booster
+from catalog import get_catalog
+from engine import Pod, RandomAdapter
+
+
+def current_rss():
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * 4096
+
+async def draft_pods(mtg_set, pods, seats, picks, rng):
+    # Pods are stopped after `picks` picks per seat and kept alive, so the
+    # measurement covers packs still in flight as well as drafted pools.
+    running = []
+    for _ in range(pods):
+        pod = Pod(mtg_set)
+        for seat_id in range(seats):
+            pod.add_seat(seat_id, RandomAdapter(rng))
+        await pod.start(Booster.generate_pod(mtg_set, seats))
+        running.append(pod)
+
+    while min(len(seat.pool) for pod in running for seat in pod.seats) < picks:
+        await asyncio.sleep(0)
+
+    for pod in running:
+        for task in pod.tasks:
+            task.cancel()
+
+    return running
+
+def _measure(mtg_set, pods, seats, picks, seed):
+    get_catalog(mtg_set)
+    gc.collect()
+    start_rss = current_rss()
+
+    running = asyncio.run(draft_pods(mtg_set, pods, seats, picks, random.Random(seed)))
+    gc.collect()
+
+    return (current_rss() - start_rss) / len(running)
+
+def measure(mtg_set, pods, seats, picks, seed):
+    # A fresh interpreter per set so catalogs and freed arenas don't carry over.
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        return pool.apply(_measure, (mtg_set, pods, seats, picks, seed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure resident memory per drafting pod.')
+    parser.add_argument('sets', nargs='*', default=['CMR', 'ZNR', '2XM'])
+    parser.add_argument('--pods', type=int, default=200)
+    parser.add_argument('--seats', type=int, default=8)
+    parser.add_argument('--picks', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    for mtg_set in args.sets:
+        pod_bytes = measure(mtg_set.upper(), args.pods, args.seats, args.picks, args.seed)
+        print(f'{mtg_set.upper()}: ~{pod_bytes / 1024:.0f} KiB RSS per pod '
+              f'({args.seats} seats, {args.picks} picks each)')
@@ -0,0 +1,57 @@
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+from constants import SET_PATH
+from setpack import compile_set, pack_path
+
+
+BENCH_SETS = ['CMR', 'ZNR', '2XM']
+RUNS = 5
+
+
+def _measure(path, runs):
+    from catalog import SetCatalog
+
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        SetCatalog.load_file(path)
+        timings.append(time.perf_counter() - start)
+
+    end_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return min(timings), end_rss - start_rss
+
+def measure(path, runs=RUNS):
+    # Each load runs in a fresh interpreter so peak RSS isn't shared between runs.
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        return pool.apply(_measure, (path, runs))
+
+
+if __name__ == '__main__':
+    mtg_sets = BENCH_SETS
+    if len(sys.argv) > 1:
+        mtg_sets = [mtg_set.upper() for mtg_set in sys.argv[1:]]
+
+    print(f'{"set":<6}{"json ms":>10}{"pack ms":>10}{"json KB":>10}{"pack KB":>10}')
+    for mtg_set in mtg_sets:
+        json_path = f'{SET_PATH}/{mtg_set}.json'
+        if not os.path.exists(json_path):
+            print(f'{mtg_set:<6}(missing {json_path})')
+            continue
+
+        compiled = pack_path(json_path)
+        if not os.path.exists(compiled):
+            compile_set(json_path)
+
+        json_time, json_rss = measure(json_path)
+        pack_time, pack_rss = measure(compiled)
+
+        print(f'{mtg_set:<6}{json_time * 1000:>10.2f}{pack_time * 1000:>10.2f}'
+              f'{json_rss:>10}{pack_rss:>10}')
@@ -0,0 +1,120 @@
+import bisect
+import re
+
+from constants import MTG_COLORS
+from setpack import RARITIES
+
+
+POOL_ORDERS = ('pick', 'number', 'color', 'rarity')
+
+
+def mana_value(card):
+    return int(card.get('manaValue', card.get('convertedManaCost', 0)))
+
+def _number_key(number):
+    digits = re.match(r'\d*', number).group()
+    return (int(digits) if digits else 0, number)
+
+def _color_rank(colors):
+    if len(colors) == 1:
+        return MTG_COLORS.index(colors[0])
+    if colors:
+        return len(MTG_COLORS)
+    return len(MTG_COLORS) + 1
+
+
+class CardPool():
+    # A drafted pool that groups cards into "Nx Name" lines as they are picked.
+    # Every sort order keeps its rendered lines in display order, so a pick
+    # rewrites or inserts one line per order. Orders other than pick order are
+    # built the first time they're asked for and kept sorted by insertion after.
+    def __init__(self, cards=()):
+        self.cards = []
+        self.lines = {}             # (number, foil) -> [count, name, card, pick position, sort entries]
+        self.indexes = {}
+        self.texts = {'pick': []}
+        self.rendered = {}
+
+        self.extend(cards)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def __getitem__(self, i):
+        return self.cards[i]
+
+    @staticmethod
+    def sort_key(order, card):
+        number = _number_key(card['number']) + (card['is_foil'],)
+        if order == 'color':
+            return (_color_rank(card['colors']),) + number
+        if order == 'rarity':
+            return (-RARITIES.index(card.get('rarity', 'common')),) + number
+        return number
+
+    def extend(self, cards):
+        for card in cards:
+            self.append(card)
+
+    def append(self, card):
+        self.cards.append(card)
+        self.rendered = {}
+
+        key = (card['number'], card['is_foil'])
+        line = self.lines.get(key)
+        if line:
+            line[0] += 1
+            text = f'{line[0]}x {line[1]}\n'
+            self.texts['pick'][line[3]] = text
+            for order, index in self.indexes.items():
+                self.texts[order][bisect.bisect_left(index, line[4][order])] = text
+            return
+
+        cardname = card['name']
+        if card['is_foil']:
+            cardname += ' \*FOIL\*'
+        line = self.lines[key] = [1, cardname, card, len(self.texts['pick']), {}]
+
+        text = f'1x {cardname}\n'
+        self.texts['pick'].append(text)
+        for order, index in self.indexes.items():
+            entry = line[4][order] = (self.sort_key(order, card), key)
+            i = bisect.bisect_left(index, entry)
+            index.insert(i, entry)
+            self.texts[order].insert(i, text)
+
+    def format(self, order='pick'):
+        if order not in self.texts:
+            for key, line in self.lines.items():
+                line[4][order] = (self.sort_key(order, line[2]), key)
+            self.indexes[order] = sorted(line[4][order] for line in self.lines.values())
+            self.texts[order] = [f'{self.lines[key][0]}x {self.lines[key][1]}\n'
+                                 for _, key in self.indexes[order]]
+
+        # Joining the lines is the only per-render work left.
+        if order not in self.rendered:
+            self.rendered[order] = ''.join(self.texts[order])
+
+        return self.rendered[order]
+
+    def stats(self):
+        # One pass over the grouped lines rather than the whole pool.
+        colors = dict.fromkeys(MTG_COLORS + ['C'], 0)
+        curve = {}
+        for count, _, card, _, _ in self.lines.values():
+            for color in card['colors'] or ['C']:
+                colors[color] += count
+            cmc = mana_value(card)
+            curve[cmc] = curve.get(cmc, 0) + count
+
+        return colors, curve
+
+    def format_stats(self):
+        colors, curve = self.stats()
+        colors = ' '.join(f'{color} {count}' for color, count in colors.items() if count)
+        curve = ' '.join(f'{cmc}: {curve[cmc]}' for cmc in sorted(curve))
+
+        return f'Colors: {colors}\nCurve: {curve}'
@@ -0,0 +1,197 @@
+import json
+import numpy as np
+import os
+import re
+import threading
+
+from collections import OrderedDict
+
+from constants import CATALOG_CACHE_SIZE, SET_PATH
+from nameindex import NameIndex
+from sampler import SheetSampler
+from setpack import PACK_EXT, SetPack, pack_path
+
+
+_catalogs = OrderedDict()
+_catalogs_lock = threading.Lock()
+
+
+def true_name(name):
+    return re.sub(r'[^a-zA-Z0-9]', '', name).lower()
+
+def set_files(mtg_set):
+    mtg_set = mtg_set.upper()
+    paths = [f'{SET_PATH}/{mtg_set}.json']
+
+    # Mystery Booster foils live in their own set file.
+    if mtg_set == 'MB1':
+        paths.append(f'{SET_PATH}/FMB1.json')
+
+    return paths
+
+def source_files(mtg_set):
+    # Prefer a compiled pack unless the JSON it was built from is newer.
+    sources = []
+    for path in set_files(mtg_set):
+        compiled = pack_path(path)
+        if (os.path.exists(compiled) and
+                (not os.path.exists(path) or
+                 os.stat(compiled).st_mtime_ns >= os.stat(path).st_mtime_ns)):
+            sources.append(compiled)
+        else:
+            sources.append(path)
+
+    return sources
+
+def catalog_card(mtg_set, uuid, is_foil):
+    return get_catalog(mtg_set).card(uuid, is_foil)
+
+def load_pack_lists(mtg_set, uuid_lists, foil_lists):
+    catalog = get_catalog(mtg_set)
+    id_index = catalog.id_index
+    return PackLists(catalog, [[Card(catalog, id_index[uuid], foil)
+                                for uuid, foil in zip(uuids, foils)]
+                               for uuids, foils in zip(uuid_lists, foil_lists)])
+
+def set_version(mtg_set):
+    return tuple((path, os.stat(path).st_mtime_ns) for path in source_files(mtg_set))
+
+def get_catalog(mtg_set):
+    mtg_set = mtg_set.upper()
+
+    # Boosters are generated in executor threads as well as on the event loop.
+    with _catalogs_lock:
+        mtimes = set_version(mtg_set)
+        paths = [path for path, _ in mtimes]
+
+        catalog = _catalogs.get(mtg_set)
+        if catalog and catalog.mtimes == mtimes:
+            _catalogs.move_to_end(mtg_set)
+            return catalog
+
+        catalog = SetCatalog.from_files(mtg_set, paths, mtimes)
+        _catalogs[mtg_set] = catalog
+        _catalogs.move_to_end(mtg_set)
+        while len(_catalogs) > CATALOG_CACHE_SIZE:
+            _catalogs.popitem(last=False)
+
+        return catalog
+
+
+class Card():
+    # A card in a pack or pool: the catalog row it refers to plus its foil flag.
+    # Reads like the card dict it replaces, without copying it.
+    __slots__ = ('catalog', 'index', 'is_foil')
+
+    def __init__(self, catalog, index, is_foil=False):
+        self.catalog = catalog
+        self.index = index
+        self.is_foil = is_foil
+
+    def __getitem__(self, key):
+        if key == 'is_foil':
+            return self.is_foil
+        return self.catalog.cards[self.index][key]
+
+    def get(self, key, default=None):
+        if key == 'is_foil':
+            return self.is_foil
+        return self.catalog.cards[self.index].get(key, default)
+
+    def __reduce__(self):
+        # Pickled by uuid so cards from other processes reattach to that
+        # process's catalog. Whole packs go through PackLists instead.
+        return (catalog_card, (self.catalog.set, self['uuid'], self.is_foil))
+
+
+class PackLists(list):
+    # Card lists from one set, pickled as uuids and foil flags so a batch from
+    # the pack pool processes looks its catalog up once rather than per card.
+    def __init__(self, catalog, pack_lists=()):
+        super().__init__(pack_lists)
+        self.catalog = catalog
+
+    def __reduce__(self):
+        return (load_pack_lists, (self.catalog.set,
+                                  [[card['uuid'] for card in cards] for cards in self],
+                                  [[card.is_foil for card in cards] for cards in self]))
+
+
+class SetCatalog():
+    def __init__(self, mtg_set, cards, booster_info, mtimes):
+        self.set = mtg_set
+        self.cards = cards
+        self.booster_info = booster_info
+        self.mtimes = mtimes
+        self.samplers = {}
+        self.sheet_ids = {}
+        self.names = None
+
+        self.booster_probs = None
+        if self.booster_info:
+            config_weights = np.array([b['weight'] for b in self.booster_info['boosters']], dtype=float)
+            self.booster_probs = config_weights / config_weights.sum()
+
+        self.uuid_index = {}
+        self.id_index = {}
+        self.name_index = {}
+        for i, card in enumerate(self.cards):
+            self.uuid_index[card['uuid']] = card
+            self.id_index[card['uuid']] = i
+            self.name_index.setdefault(true_name(card['name']), []).append(card)
+
+    @classmethod
+    def from_files(cls, mtg_set, paths, mtimes):
+        cards, booster_info = cls.load_file(paths[0])
+        for path in paths[1:]:
+            cards += cls.load_file(path)[0]
+
+        return cls(mtg_set, cards, booster_info, mtimes)
+
+    @staticmethod
+    def load_file(path):
+        if path.endswith(PACK_EXT):
+            try:
+                set_pack = SetPack(path)
+                return set_pack.cards(), set_pack.booster_info()
+            except ValueError:
+                # Packs from an older compiler are ignored until recompiled.
+                path = os.path.splitext(path)[0] + '.json'
+
+        with open(path, encoding='UTF-8') as f:
+            set_data = json.load(f)['data']
+
+        booster_info = None
+        if 'booster' in set_data:
+            booster_info = set_data['booster']['default']
+
+        return set_data['cards'], booster_info
+
+    def sheet_sampler(self, sheet):
+        if sheet not in self.samplers:
+            sheet_info = self.booster_info['sheets'][sheet]
+
+            card_colors = None
+            if sheet_info.get('balanceColors'):
+                card_colors = [self.uuid_index[uuid]['colors'] for uuid in sheet_info['cards']]
+
+            self.samplers[sheet] = SheetSampler(sheet_info['cards'], card_colors,
+                                                sheet_info.get('alias'))
+            self.sheet_ids[sheet] = np.array([self.id_index[uuid] for uuid in sheet_info['cards']])
+
+        return self.samplers[sheet]
+
+    def card(self, uuid, is_foil=False):
+        return Card(self, self.id_index[uuid], bool(is_foil))
+
+    def name_lookup(self):
+        if self.names is None:
+            self.names = NameIndex({name: [word for word in map(true_name, cards[0]['name'].split()) if word]
+                                    for name, cards in self.name_index.items()})
+        return self.names
+
+    def match_names(self, cardname, within=None):
+        return self.name_lookup().match(true_name(cardname), within)
+
+    def display_name(self, name):
+        return self.name_index[name][0]['name']
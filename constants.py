@@ -1,5 +1,62 @@
 SET_PATH = 'set_jsons'
+RATINGS_PATH = 'ratings'
 MTG_COLORS = ['W', 'U', 'B', 'R', 'G']
+CATALOG_CACHE_SIZE = 8
+BALANCE_BATCH = 4
+
+PACK_POOL_LOW = 24
+PACK_POOL_HIGH = 48
+PACK_POOL_WORKERS = 2
+
+RENDER_DEBOUNCE = 0.5
+SIGNUP_DEBOUNCE = 2.0
+
+DM_CONCURRENCY = 8
+DM_RETRIES = 3
+DM_BACKOFF = 0.5
+
+SEALED_PACKS = 6
+SEALED_MAX_PACKS = 12
+SEALED_MAX_PLAYERS = 500
+SEALED_GROUP = 10
+SEALED_DM_RATE = 20
+
+QUEUE_POD_SIZE = 8
+QUEUE_BATCH = 0.5
+LOBBY_DEBOUNCE = 2.0
+
+BOT_COLOR_COMMITMENT = 2.0
+
+PICK_TIMER = 60
+TIMER_TICK = 0.5
+
+JOURNAL_PATH = 'drafts.db'
+JOURNAL_FLUSH = 0.05
+
+DRAFT_WORKERS = 0
+HASH_REPLICAS = 64
+WORKER_TIMEOUT = 30
+POD_RECOVERIES = 3
+
+METRICS_PATH = 'metrics.prom'
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 0
+METRICS_INTERVAL = 15
+LOOP_LAG_INTERVAL = 0.5
+
+ODDS_PACKS = 100000
+ODDS_CHUNK = 20000
+ODDS_WORKERS = 2
+ODDS_CACHE_SIZE = 16
+
+PROFILE_PATH = 'profiles'
+PROFILE_TOP = 25
+
+SCRYFALL_URL_MAX = 1000
+SCRYFALL_CACHE_SIZE = 4096
+
+SET_SOURCE = 'https://mtgjson.com/api/v5'
+FORMATS_PATH = 'formats.json'
 
 SUPPORTED_FORMATS = {'CMR': 'https://i.imgur.com/daf5Ffg.png',
                      'ZNR': 'https://i.imgur.com/eWwjmid.png',
@@ -1,32 +1,288 @@
 import asyncio
 import discord
-import json
+import logging
+import os
 import random
-import requests
 import string
+import time
 
 from discord.ext import commands
 
-from booster import Booster, get_card, true_name
-from constants import IMG_NOT_FOUND, SUPPORTED_FORMATS
+from booster import Booster
+from cardpool import POOL_ORDERS, CardPool
+from catalog import get_catalog, true_name
+from constants import (DM_CONCURRENCY, DRAFT_WORKERS, IMG_NOT_FOUND, ODDS_PACKS, PICK_TIMER,
+                       SEALED_DM_RATE, SEALED_GROUP, SEALED_MAX_PACKS, SEALED_MAX_PLAYERS,
+                       SEALED_PACKS, SET_SOURCE, SIGNUP_DEBOUNCE, SUPPORTED_FORMATS)
+from drafter import BotAdapter
+from engine import PlayerAdapter, Pod, collect_timer_metrics
+from fanout import FanOut
+from journal import Journal, restore_pod
+from matchmaking import Matchmaker, format_names
+from metrics import METRICS, RATIO_BUCKETS, LoopMonitor, MetricsExporter
+from odds import OddsRunner
+from packpool import PackPool, generate_pool_packs
+from profiler import PodProfiler
+from render import MessageRenderer, collect_render_metrics, format_render_stats
+from scryfall import ScryfallLinks
+from sets import load_formats, prepare_set, register_format, unregister_format
+from shard import ShardCoordinator
+from timerwheel import TimerWheel
 
 
-SCRYFALL_SET_URL = 'https://api.scryfall.com/sets'
 EMPTY_POOL_URL = 'https://scryfall.com/search?q=cn%3A-1'
+# Commands that stay open for a whole signup or draft, left out of command latency.
+LONG_COMMANDS = ('create_draft', 'create_sealed')
+
+
+def did_you_mean(catalog, matches, limit=5):
+    names = [catalog.display_name(name) for name in matches[:limit]]
+    if len(matches) > limit:
+        names.append('...')
+    return f'Did you mean: {"; ".join(names)}?'
+
+def format_image_links(urls):
+    if len(urls) == 1:
+        return f'[Card images]({urls[0]})'
+
+    links = [f'[{i+1}]({url})' for i, url in enumerate(urls)]
+    return 'Card images: ' + ' '.join(links)
+
+def split_field(name, text, limit=1024):
+    # Embed fields hold 1024 characters, so long card lists continue in more fields.
+    fields = [{'name': name, 'value': ''}]
+    for line in text.splitlines(keepends=True):
+        if len(fields[-1]['value']) + len(line) > limit:
+            fields.append({'name': f'{name} (cont.)', 'value': ''})
+        fields[-1]['value'] += line
+    return fields
+
+def sealed_embed(mtg_set, pool):
+    card_images = ScryfallLinks(mtg_set, pool).urls()
+    fields = split_field('CARDS', pool.format('color'))
+    fields.append({'name': 'STATS', 'value': pool.format_stats()})
+
+    return discord.Embed.from_dict({'title': f'{mtg_set} Sealed Pool ({len(pool)} cards)',
+                                    'description': format_image_links(card_images),
+                                    'fields': fields})
+
+def chunk_lines(lines, limit=1900):
+    chunks = ['']
+    for line in lines:
+        if chunks[-1] and len(chunks[-1]) + len(line) + 1 > limit:
+            chunks.append('')
+        chunks[-1] += line[:limit] + '\n'
+    return chunks
 
 
 class MTGDraftManager(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.drafts = {}
+        self.drafts = {}            # signup message id -> Draft
+        self.draft_ids = {}         # short draft id -> signup message id
+        self.player_drafts = {}     # user id -> signup message id
+
+        load_formats()
+        self.pack_pool = PackPool(SUPPORTED_FORMATS)
+        self.timer_wheel = TimerWheel()
+        self.journal = Journal()
+        self.resumed = False
+        self.fanout = FanOut()
+        # Sealed pools go out in bursts of hundreds, paced so drafts keep some API headroom.
+        self.sealed_fanout = FanOut(DM_CONCURRENCY, rate=SEALED_DM_RATE)
+        # Signup and lobby edits retry on their own, away from the DM bursts.
+        self.channel_fanout = FanOut()
+        self.odds_runner = OddsRunner()
+        self.matchmaker = Matchmaker(self.form_pod, fanout=self.channel_fanout)
+        self.logger = logging.getLogger('discord')
+
+        # DRAFT_PROFILE lists draft ids to profile as soon as they start or resume.
+        self.profiler = None
+        self.profile_ids = set(filter(None, os.getenv('DRAFT_PROFILE', '').upper().split(',')))
+
+        self.loop_monitor = LoopMonitor()
+        self.metrics_exporter = MetricsExporter()
+        self.metric_collectors = [self.collect_metrics, self.pack_pool.collect_metrics,
+                                  self.fanout.collect_metrics, collect_render_metrics,
+                                  collect_timer_metrics]
+        for collector in self.metric_collectors:
+            METRICS.add_collector(collector)
+
+        # Pods run in worker processes when DRAFT_WORKERS is set.
+        self.shards = None
+        if DRAFT_WORKERS:
+            self.shards = ShardCoordinator(DRAFT_WORKERS)
+
+    def cog_unload(self):
+        self.pack_pool.shutdown()
+        self.odds_runner.shutdown()
+        self.timer_wheel.stop()
+        self.journal.close()
+        self.loop_monitor.stop()
+        self.metrics_exporter.stop()
+        for collector in self.metric_collectors:
+            METRICS.remove_collector(collector)
+        if self.shards:
+            asyncio.create_task(self.shards.shutdown())
+
+    @commands.Cog.listener('on_ready')
+    async def start_background_services(self):
+        self.pack_pool.start()
+        self.timer_wheel.start()
+        self.journal.start()
+        self.loop_monitor.start()
+        self.metrics_exporter.start()
+        if self.shards:
+            self.shards.start()
+
+        if not self.resumed:
+            self.resumed = True
+            await self.resume_drafts()
+
+    async def cog_before_invoke(self, ctx):
+        ctx.invoked_at = time.perf_counter()
+
+        if self.profiler and ctx.command.qualified_name not in LONG_COMMANDS:
+            curr_draft = self.drafts.get(self.player_in_draft(ctx.author))
+            if curr_draft and curr_draft.profiler:
+                ctx.profiler = curr_draft.profiler
+                ctx.profiler.enter()
+
+    async def cog_after_invoke(self, ctx):
+        if hasattr(ctx, 'profiler'):
+            ctx.profiler.exit()
+
+        command = ctx.command.qualified_name
+        if command in LONG_COMMANDS or not hasattr(ctx, 'invoked_at'):
+            return
+
+        METRICS.observe('command_seconds', time.perf_counter() - ctx.invoked_at, command=command)
+        if ctx.command_failed:
+            METRICS.inc('command_errors', command=command)
+
+    def collect_metrics(self):
+        in_progress = [curr_draft for curr_draft in self.drafts.values() if curr_draft.pod]
+        yield 'drafts_open', 'gauge', {}, len(self.drafts) - len(in_progress)
+        yield 'drafts_running', 'gauge', {}, len(in_progress)
+        yield 'players_in_drafts', 'gauge', {}, len(self.player_drafts)
+
+        for curr_draft in in_progress:
+            labels = {'pod': curr_draft.id, 'set': curr_draft.mtg_set}
+            seats = curr_draft.draft_table.values()
+            yield 'pod_picks', 'counter', labels, sum(len(seat.pool) for seat in seats)
+            yield 'pod_api_calls', 'counter', labels, sum(seat.adapter.api_calls for seat in seats)
+            yield 'pod_autopicks', 'counter', labels, sum(seat.adapter.autopicks for seat in seats)
+
+    def record_draft_metrics(self, curr_draft):
+        seats = curr_draft.draft_table.values()
+        picks = sum(len(seat.pool) for seat in seats)
+        if picks:
+            api_calls = sum(seat.adapter.api_calls for seat in seats)
+            METRICS.observe('api_calls_per_pick', api_calls / picks, RATIO_BUCKETS,
+                            set=curr_draft.mtg_set)
+        METRICS.inc('drafts_finished', set=curr_draft.mtg_set)
+
+    def start_profile(self, curr_draft):
+        self.profiler = PodProfiler(curr_draft.id)
+        self.profiler.start()
+        curr_draft.profiler = self.profiler
+        if curr_draft.pod:
+            self.profiler.attach(curr_draft.pod)
+
+    async def finish_profile(self, curr_draft):
+        profiler = curr_draft.profiler
+        curr_draft.profiler = None
+        if self.profiler is profiler:
+            self.profiler = None
+
+        return await profiler.finish()
+
+    async def resume_drafts(self):
+        for record in self.journal.load():
+            try:
+                await self.resume_draft(record)
+            except Exception:
+                # A pod that can't be restored is dropped so the rest still resume.
+                self.logger.exception(f'Failed to resume draft {record["id"]}')
+                curr_draft = self.find_draft(record['id'])
+                if curr_draft:
+                    self.remove_draft(curr_draft)
+                self.journal.finish_pod(record['id'])
+
+    async def resume_draft(self, record):
+        info = record['info']
+
+        channel = self.bot.get_channel(info['channel_id'])
+        signup_msg = discord.Object(id=info['signup_id'])
+        if channel:
+            signup_msg = channel.get_partial_message(info['signup_id'])
+
+        curr_draft = Draft(signup_msg, info['mtg_set'], record['id'],
+                           info['owner'], info['table_size'])
+        curr_draft.bots = info['bots']
+        curr_draft.full = True
+        curr_draft.in_progress = True
+        self.add_draft(curr_draft)
+
+        adapters = {}
+        for seat_id in info['seats']:
+            if seat_id < 0:
+                adapters[seat_id] = BotAdapter(info['mtg_set'])
+            else:
+                player = self.bot.get_user(seat_id) or await self.bot.fetch_user(seat_id)
+                adapters[seat_id] = DiscordAdapter(player, self.fanout)
+                self.add_player(curr_draft, player)
+
+        pod = await restore_pod(record, adapters, self.timer_wheel, self.journal)
+        for seat in pod.seats:
+            if seat.id >= 0:
+                curr_draft.draft_table[seat.id] = seat
+        curr_draft.pod = pod
+        if curr_draft.id in self.profile_ids and not self.profiler:
+            self.start_profile(curr_draft)
+
+        asyncio.create_task(self.finish_draft(curr_draft), name=f'{curr_draft.id}_resume')
 
     def player_in_draft(self, player):
-        for draft in self.drafts:
-            for drafter in self.drafts[draft].players:
-                if player.id == drafter.id:
-                    return draft
-        
-        return None
+        return self.player_drafts.get(player.id)
+
+    def find_draft(self, draft_id):
+        signup_id = self.draft_ids.get(draft_id)
+        if signup_id is None:
+            return None
+
+        return self.drafts[signup_id]
+
+    def add_draft(self, curr_draft):
+        self.drafts[curr_draft.signup_msg.id] = curr_draft
+        self.draft_ids[curr_draft.id] = curr_draft.signup_msg.id
+
+    def remove_draft(self, curr_draft):
+        signup_id = curr_draft.signup_msg.id
+        self.drafts.pop(signup_id, None)
+        self.draft_ids.pop(curr_draft.id, None)
+
+        for player in curr_draft.players:
+            if self.player_drafts.get(player.id) == signup_id:
+                del self.player_drafts[player.id]
+
+    def add_player(self, curr_draft, player):
+        curr_draft.players.append(player)
+        self.player_drafts[player.id] = curr_draft.signup_msg.id
+
+    def remove_player(self, curr_draft, player):
+        curr_draft.players.remove(player)
+        if self.player_drafts.get(player.id) == curr_draft.signup_msg.id:
+            del self.player_drafts[player.id]
+
+    def update_signups(self, curr_draft):
+        if not curr_draft.signup_renderer:
+            curr_draft.signup_renderer = MessageRenderer(curr_draft.signup_msg.channel,
+                                                         curr_draft.signup_embed, SIGNUP_DEBOUNCE,
+                                                         self.channel_fanout,
+                                                         msg=curr_draft.signup_msg,
+                                                         edit_only=True)
+        curr_draft.signup_renderer.request()
 
     # Draft management commands
 
@@ -37,197 +293,568 @@ class MTGDraftManager(commands.Cog):
                                    'when !start_draft is called.'))
     @commands.guild_only()
     async def create_draft(self, ctx, mtg_set, max_players=8):
-        def _id_collision(draft_id):
-            for draft in self.drafts.values():
-                if draft.id == draft_id:
-                    return True
-            return False
-        
-        def _msg_check(reaction, user):
-            return (reaction.message.id == self.signup_id and
-                    reaction.emoji == '✋')
+        mtg_set = mtg_set.upper()
+        if mtg_set not in SUPPORTED_FORMATS:
+            await ctx.send('Unsupported draft format.')
+            return
+
+        curr_draft = await self.open_signups(ctx, mtg_set, 'Draft',
+                                             f'{max_players}-person {mtg_set} draft.',
+                                             f'Will also fire upon reaching {max_players} people.',
+                                             max_players)
+
+        await curr_draft.start.wait()
 
+        curr_draft.in_progress = True
+        await self.run_draft(curr_draft)
+
+    @commands.command(brief='Opens signups for a sealed event.',
+                      description=('Opens a sealed event in the format given by mtg_set, '
+                                   'where everyone who signs up gets a pool of packs '
+                                   'boosters (6 by default) in their DMs.\n'
+                                   'The event fires when !start_draft is called.'))
+    @commands.guild_only()
+    async def create_sealed(self, ctx, mtg_set, packs=SEALED_PACKS):
         mtg_set = mtg_set.upper()
         if mtg_set not in SUPPORTED_FORMATS:
             await ctx.send('Unsupported draft format.')
             return
-        
+        if packs < 1 or packs > SEALED_MAX_PACKS:
+            await ctx.send(f'Sealed pools can have 1 to {SEALED_MAX_PACKS} packs.')
+            return
+
+        curr_draft = await self.open_signups(ctx, mtg_set, 'Sealed Event',
+                                             f'{packs}-pack {mtg_set} sealed.',
+                                             f'Takes up to {SEALED_MAX_PLAYERS} people.',
+                                             SEALED_MAX_PLAYERS)
+        curr_draft.sealed_packs = packs
+
+        await curr_draft.start.wait()
+
+        curr_draft.in_progress = True
+        await self.run_sealed(curr_draft)
+
+    def new_draft_id(self):
         draft_id = ''.join(random.choices(string.ascii_uppercase +
                                           string.digits, k=4))
-        while _id_collision(draft_id):
+        while draft_id in self.draft_ids:
             draft_id = ''.join(random.choices(string.ascii_uppercase +
                                               string.digits, k=4))
+        return draft_id
+
+    async def open_signups(self, ctx, mtg_set, kind, description, start_info, table_size):
+        draft_id = self.new_draft_id()
 
         icon_url = IMG_NOT_FOUND
         if SUPPORTED_FORMATS[mtg_set]:
             icon_url = SUPPORTED_FORMATS[mtg_set]
 
-        draft_embed = {'title': f'{ctx.author.display_name}\'s Draft',
-                       'description': f'{max_players}-person {mtg_set} draft.\nReact with ✋ to join!',
+        draft_embed = {'title': f'{ctx.author.display_name}\'s {kind}',
+                       'description': f'{description}\nReact with ✋ to join!',
                        'thumbnail': {'url': f'{icon_url}'},
                        'fields': [{'name': 'Signed Up', 'value': '(Nobody yet!)'},
                                   {'name': 'Draft ID', 'value': (f'Start with !start_draft {draft_id}.\n'
-                                                                 f'Will also fire upon reaching {max_players} people.')},
+                                                                 f'{start_info}')},
                                   {'name': 'Status', 'value': 'Open'}
                                  ]}
 
         signups = await ctx.send(embed=discord.Embed.from_dict(draft_embed))
 
-        self.drafts[signups.id] = Draft(signups, mtg_set, draft_id, ctx.author.id, max_players)
+        curr_draft = Draft(signups, mtg_set, draft_id, ctx.author.id, table_size)
+        curr_draft.embed = draft_embed
+        self.add_draft(curr_draft)
 
         await signups.add_reaction('✋')
 
-        curr_draft = self.drafts[signups.id]
-        await curr_draft.start.wait()
+        return curr_draft
+
+    async def run_sealed(self, curr_draft):
+        start = time.perf_counter()
+        mtg_set = curr_draft.mtg_set
+        packs = curr_draft.sealed_packs
+        players = list(curr_draft.players)
+
+        # Pools are generated a group of players at a time across the pack pool
+        # processes, and each group's DMs go out as soon as its packs are back.
+        groups = [players[i:i + SEALED_GROUP] for i in range(0, len(players), SEALED_GROUP)]
+        loop = asyncio.get_running_loop()
+        pending = {loop.run_in_executor(self.pack_pool.executor, generate_pool_packs,
+                                        mtg_set, len(group) * packs): group
+                   for group in groups}
+
+        deliveries = []
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                group = pending.pop(future)
+                try:
+                    pack_lists = future.result()
+                except Exception as e:
+                    self.logger.exception(f'Failed to generate sealed pools for {curr_draft.id}')
+                    deliveries.append((group, [e] * len(group)))
+                    continue
+
+                pools = []
+                for i, player in enumerate(group):
+                    pools.append((player, CardPool(card for pack in pack_lists[i * packs:(i + 1) * packs]
+                                                   for card in pack)))
+                deliveries.append((group, asyncio.create_task(self.sealed_fanout.run(
+                    pools, lambda player_pool: self.send_sealed_pool(mtg_set, *player_pool)))))
+        METRICS.observe('sealed_generation_seconds', time.perf_counter() - start, set=mtg_set)
+
+        results = []
+        for group, delivery in deliveries:
+            if isinstance(delivery, list):
+                results += zip(group, delivery)
+            else:
+                results += zip(group, await delivery)
+        elapsed = time.perf_counter() - start
+        METRICS.observe('sealed_delivery_seconds', elapsed, set=mtg_set)
+
+        failed = []
+        for player, result in results:
+            if isinstance(result, Exception):
+                failed.append(player)
+                self.logger.warning(f'Could not send sealed pool for {curr_draft.id} '
+                                    f'to {player}: {result}')
+        self.logger.info(f'Sealed event {curr_draft.id}: {len(players) * packs} boosters for '
+                         f'{len(players)} players delivered in {elapsed:.2f}s')
+
+        status = f'Pools sent to {len(players) - len(failed)} players'
+        if failed:
+            status += f'\nCould not DM: {format_names([player.display_name for player in failed])}'
+        curr_draft.embed['fields'][2]['value'] = status
+        self.update_signups(curr_draft)
+
+        self.remove_draft(curr_draft)
+
+    async def send_sealed_pool(self, mtg_set, player, pool):
+        embed = sealed_embed(mtg_set, pool)
+        await self.sealed_fanout.call(lambda: player.send(f'Your {mtg_set} sealed pool:', embed=embed))
+
+    @commands.command(brief='Joins the matchmaking queue for a format.',
+                      description=('Puts you in the queue for mtg_set. A draft pod fires '
+                                   'as soon as 8 players are waiting.\n'
+                                   'Without mtg_set, shows how many players are queued.'))
+    @commands.guild_only()
+    async def queue(self, ctx, mtg_set=''):
+        if not mtg_set:
+            await ctx.send(self.matchmaker.format_queues())
+            return
 
+        mtg_set = mtg_set.upper()
+        if mtg_set not in SUPPORTED_FORMATS:
+            await ctx.send('Unsupported draft format.')
+            return
+        if self.player_in_draft(ctx.author) or self.matchmaker.is_queued(ctx.author):
+            await ctx.author.send('You cannot join more than one draft at a time.')
+            return
+
+        # Confirmation shows up in the lobby message rather than a reply per join.
+        lobby = self.matchmaker.join(ctx.author, mtg_set, ctx.channel)
+        if lobby.channel != ctx.channel:
+            await ctx.send(f'Queued for {mtg_set}. The lobby is in {lobby.channel.mention}.')
+
+    @commands.command(brief='Leaves the matchmaking queue.',
+                      description='Takes you out of the queue you joined with !queue.')
+    async def leave_queue(self, ctx):
+        if not self.matchmaker.is_queued(ctx.author):
+            await ctx.send('You are not in a queue.')
+            return
+
+        if not self.matchmaker.leave(ctx.author):
+            await ctx.send('Your pod is already being set up.')
+
+    def form_pod(self, lobby, players):
+        asyncio.create_task(self.run_queued_draft(lobby, players))
+
+    async def run_queued_draft(self, lobby, players):
+        draft_id = self.new_draft_id()
+        mtg_set = lobby.mtg_set
+
+        draft_embed = {'title': f'{mtg_set} Queue Pod',
+                       'description': f'{len(players)}-person {mtg_set} draft from the queue.',
+                       'fields': [{'name': 'Players',
+                                   'value': format_names([player.display_name for player in players])},
+                                  {'name': 'Draft ID', 'value': draft_id},
+                                  {'name': 'Status', 'value': 'Started'}
+                                 ]}
+        try:
+            signup_msg = await lobby.channel.send(embed=discord.Embed.from_dict(draft_embed))
+        except discord.HTTPException:
+            self.logger.exception(f'Could not announce {mtg_set} queue pod {draft_id}')
+            self.matchmaker.release(players)
+            return
+
+        curr_draft = Draft(signup_msg, mtg_set, draft_id, self.bot.user.id, len(players))
+        curr_draft.embed = draft_embed
+        curr_draft.full = True
         curr_draft.in_progress = True
+        for player in players:
+            self.add_player(curr_draft, player)
+        self.add_draft(curr_draft)
+        self.matchmaker.release(players)
+
         await self.run_draft(curr_draft)
 
     async def run_draft(self, curr_draft):
+        start = time.perf_counter()
         mtg_set = curr_draft.mtg_set
         players = curr_draft.players
 
-        for player in players:
-            await player.send(f'Your {mtg_set} draft is starting!.\n')
-            help_msg = await player.send('Commands:\n!pick cardname/number = picks a card\n'
-                                         '!show cardname/number = view a card\n'
-                                         '!pack = show pack\n!pool = show cardpool')
-            # Pin help commands if first time. Otherwise, re-send.
-
-            player_pins = await player.dm_channel.pins()
-            if not player_pins:
-                await help_msg.pin()
-
-        random.shuffle(players)
-        draft_table = {}
-        for player in players:
-            draft_table[player.id] = DraftPlayer(player, mtg_set, curr_draft)
+        # Start messages go out to every player at once while the packs are dealt.
+        notified = asyncio.create_task(self.fanout.run(players,
+                                                       lambda player: self.notify_player(player, mtg_set)))
+        adapters = {player.id: DiscordAdapter(player, self.fanout) for player in players}
 
-        for i, player in enumerate(players):
-            left_id = players[(i-1)%len(players)].id
-            right_id = players[(i+1)%len(players)].id
-            draft_table[player.id].set_neighbors(draft_table[left_id],
-                                                 draft_table[right_id])
+        # Bots sit at negative seat ids so they never collide with Discord user ids.
+        seating = [player.id for player in players] + [-i for i in range(1, curr_draft.bots + 1)]
+        random.shuffle(seating)
 
-        for player in players:
-            asyncio.create_task(draft_table[player.id].pack_runner(),
-                                name=f'{curr_draft.id}_pack_q_{player.id}')
-            
-            for i in range(1, 4):
-                give_pack = Booster(mtg_set, draft_round=i)
-                await draft_table[player.id].pack_q.put(give_pack)
-
-        curr_draft.draft_table = draft_table
-    
-        for _ in range(curr_draft.table_size):
-            await curr_draft.done.get()
-        
+        if self.shards:
+            self.log_notify_failures(curr_draft, await notified)
+            await self.run_sharded_draft(curr_draft, seating, adapters, start)
+            return
+
+        if curr_draft.id in self.profile_ids and not self.profiler:
+            self.start_profile(curr_draft)
+
+        pod = Pod(mtg_set, curr_draft.id, self.timer_wheel, PICK_TIMER)
+        for seat_id in seating:
+            if seat_id < 0:
+                pod.add_seat(seat_id, BotAdapter(mtg_set))
+            else:
+                curr_draft.draft_table[seat_id] = pod.add_seat(seat_id, adapters[seat_id])
+        curr_draft.pod = pod
+
+        if curr_draft.profiler:
+            # Generated in this process rather than the pack pool so the profile covers it.
+            curr_draft.profiler.attach(pod)
+            with curr_draft.profiler.capture():
+                pack_lists = Booster.generate_packs(mtg_set, len(seating) * 3)
+        else:
+            pack_lists = await self.pack_pool.take(mtg_set, len(seating) * 3)
+        pod_packs = Booster.deal(mtg_set, pack_lists, len(seating))
+
+        self.journal.record_pod(pod, pod_packs,
+                                {'owner': curr_draft.owner,
+                                 'table_size': curr_draft.table_size,
+                                 'bots': curr_draft.bots,
+                                 'channel_id': curr_draft.signup_msg.channel.id,
+                                 'signup_id': curr_draft.signup_msg.id})
+        pod.journal = self.journal
+
+        self.log_notify_failures(curr_draft, await notified)
+        await pod.start(pod_packs)
+        METRICS.observe('draft_start_seconds', time.perf_counter() - start, set=mtg_set)
+        asyncio.create_task(self.time_first_pack(curr_draft, adapters.values(), start))
+
+        await self.finish_draft(curr_draft)
+
+    async def notify_player(self, player, mtg_set):
+        await self.fanout.call(lambda: player.send(f'Your {mtg_set} draft is starting!.\n'))
+        help_msg = await self.fanout.call(lambda: player.send('Commands:\n!pick cardname/number = picks a card\n'
+                                                              '!show cardname/number = view a card\n'
+                                                              '!pack = show pack\n!pool = show cardpool'))
+        # Pin help commands if first time. Otherwise, re-send.
+
+        player_pins = await self.fanout.call(player.dm_channel.pins)
+        if not player_pins:
+            await self.fanout.call(help_msg.pin)
+
+    def log_notify_failures(self, curr_draft, results):
+        for player, result in zip(curr_draft.players, results):
+            if isinstance(result, Exception):
+                self.logger.warning(f'Could not send draft {curr_draft.id} start messages '
+                                    f'to {player}: {result}')
+
+    async def time_first_pack(self, curr_draft, adapters, start, timeout=PICK_TIMER):
+        # Time from the draft firing until a pack has gone out to every player.
+        waits = [asyncio.create_task(adapter.pack_renderer.rendered.wait()) for adapter in adapters]
+        done, pending = await asyncio.wait(waits, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            return
+
+        elapsed = time.perf_counter() - start
+        self.fanout.record_first_pack(elapsed)
+        self.logger.info(f'Draft {curr_draft.id} time to first pack: {elapsed:.2f}s')
+
+    async def run_sharded_draft(self, curr_draft, seating, adapters, start):
+        shard_seating = [(seat_id, adapters.get(seat_id)) for seat_id in seating]
+
+        pod = await self.shards.create_pod(curr_draft.id, curr_draft.mtg_set, shard_seating,
+                                           PICK_TIMER, {'owner': curr_draft.owner,
+                                                        'table_size': curr_draft.table_size,
+                                                        'bots': curr_draft.bots})
+        curr_draft.draft_table.update(pod.seats)
+        curr_draft.pod = pod
+        METRICS.observe('draft_start_seconds', time.perf_counter() - start, set=curr_draft.mtg_set)
+        asyncio.create_task(self.time_first_pack(curr_draft, adapters.values(), start))
+
+        await pod.finished()
+        if pod.failed:
+            await self.fanout.run(curr_draft.players,
+                                  lambda player: self.fanout.call(lambda: player.send(
+                                      f'Your {curr_draft.mtg_set} draft {curr_draft.id} was lost '
+                                      'when its draft worker crashed. Sorry!')))
+        self.cleanup_draft(curr_draft)
+
+    async def finish_draft(self, curr_draft):
+        await curr_draft.pod.finished()
+        if curr_draft.profiler:
+            await self.finish_profile(curr_draft)
+
+        self.journal.finish_pod(curr_draft.id)
         self.cleanup_draft(curr_draft)
 
     def cleanup_draft(self, curr_draft):
-        del self.drafts[curr_draft.id]
+        self.record_draft_metrics(curr_draft)
+        self.remove_draft(curr_draft)
 
     @commands.command(brief='Starts a given draft pod.',
                       description=('Fires the draft pod with draft_id.\n'
                                    'Pods can only be fired by the person who '
-                                   'made them with !create_draft.'))
-    async def start_draft(self, ctx, draft_id):
-        for draft in self.drafts.values():
-            if ctx.author.id == draft.owner and draft_id == draft.id:
-                draft.full = True
-
-                draft_embed = draft.signup_msg.embeds[0].to_dict()
-                display_names = []
-                for player in draft.players:
-                    display_names.append(player.display_name)
-                draft_embed['fields'][0]['value'] = ', '.join(display_names)
-                draft_embed['fields'][2]['value'] = 'Started'
-                await draft.signup_msg.edit(embed=discord.Embed.from_dict(draft_embed))
-                draft.start.set()
-                break
+                                   'made them with !create_draft.\n'
+                                   'Add "bots" after draft_id to fill empty seats '
+                                   'with bot drafters.'))
+    async def start_draft(self, ctx, draft_id, fill=''):
+        draft = self.find_draft(draft_id)
+        if draft and ctx.author.id == draft.owner and not draft.in_progress:
+            draft.full = True
+            if fill.lower() == 'bots' and not draft.sealed_packs:
+                draft.bots = max(0, draft.table_size - len(draft.players))
+
+            draft.embed['fields'][2]['value'] = 'Started'
+            self.update_signups(draft)
+            draft.start.set()
 
     @commands.command(brief='Cancels a given draft pod.',
                       description=('Deletes the draft with draft_id if it has not '
                                    'started. Pods can only be cancelled by the person '
                                    'who made them with !create_draft.'))
     async def cancel_draft(self, ctx, draft_id):
-        for draft in self.drafts.values():
-            if (ctx.author.id == draft.owner and
-                    draft_id == draft.id and 
-                    not draft.in_progress):
+        draft = self.find_draft(draft_id)
+        if (draft and
+                ctx.author.id == draft.owner and
+                not draft.in_progress):
 
-                draft_msg = draft.signup_msg
-                del self.drafts[draft_msg.id]
+            self.remove_draft(draft)
+            if draft.profiler:
+                await self.finish_profile(draft)
 
-                draft_embed = draft_msg.embeds[0].to_dict()
-                draft_embed['description'] = 'Draft cancelled.'
-                draft_embed['fields'][1]['value'] = 'Draft cancelled.'
-                draft_embed['fields'][2]['value'] = 'Cancelled'
-
-                await draft_msg.edit(embed=discord.Embed.from_dict(draft_embed))
-                break
+            draft.embed['description'] = 'Draft cancelled.'
+            draft.embed['fields'][1]['value'] = 'Draft cancelled.'
+            draft.embed['fields'][2]['value'] = 'Cancelled'
+            self.update_signups(draft)
 
     @commands.Cog.listener('on_reaction_add')
     async def add_drafter(self, reaction, user):
         if (reaction.message.id in self.drafts and reaction.emoji == '✋'):
             if user == self.bot.user:
                 return
-            if self.player_in_draft(user):
+            if self.player_in_draft(user) or self.matchmaker.is_queued(user):
                 await user.send('You cannot join more than one draft at a time.')
                 return
 
             curr_draft = self.drafts[reaction.message.id]
             if not curr_draft.full:
-                curr_draft.players.append(user)
+                self.add_player(curr_draft, user)
 
                 if len(curr_draft.players) >= curr_draft.table_size:
                     curr_draft.full = True
+                    curr_draft.embed['fields'][2]['value'] = 'Started'
+                    curr_draft.start.set()
 
-                    draft_embed['fields'][2]['value'] = 'Started'
-                    await reaction.message.edit(embed=discord.Embed.from_dict(draft_embed))
-
-                    await curr_draft.start.set()
+                # Bursts of joins fold into one debounced edit of the signup message.
+                self.update_signups(curr_draft)
 
-                draft_embed = reaction.message.embeds[0].to_dict()
-                display_names = []
-                for player in curr_draft.players:
-                    display_names.append(player.display_name)
-                draft_embed['fields'][0]['value'] = ', '.join(display_names)
-                await reaction.message.edit(embed=discord.Embed.from_dict(draft_embed))
-
-                if len(curr_draft.players) > 0:
+                if len(curr_draft.players) == 1:
                     await reaction.message.remove_reaction('✋', self.bot.user)
 
     @commands.Cog.listener('on_raw_reaction_remove')
     async def remove_drafter(self, payload):
         if (payload.message_id in self.drafts and str(payload.emoji) == '✋'):
             curr_draft = self.drafts[payload.message_id]
+            if curr_draft.in_progress:
+                return
+
             player_list = curr_draft.players
             for player in player_list:
                 if payload.user_id == player.id:
-                    player_list.remove(player)
-
-                    draft_embed = curr_draft.signup_msg.embeds[0].to_dict()
-                    display_names = []
-                    for player in curr_draft.players:
-                        display_names.append(player.display_name)
-                    if not display_names:
-                        display_names = ['(Nobody yet!)']
-                    draft_embed['fields'][0]['value'] = ', '.join(display_names)
-                    await curr_draft.signup_msg.edit(embed=discord.Embed.from_dict(draft_embed))
+                    self.remove_player(curr_draft, player)
+                    self.update_signups(curr_draft)
 
                     if len(player_list) == 0:
                         await curr_draft.signup_msg.add_reaction('✋')
 
                     break
 
+    @commands.command(brief='Shows booster pool stats.',
+                      description=('Shows how many pre-generated boosters are ready '
+                                   'for each format, the pool hit rate and refill times.'))
+    @commands.is_owner()
+    async def pack_pool_stats(self, ctx):
+        await ctx.send(self.pack_pool.format_stats())
+
+    @commands.command(brief='Shows pack/pool message stats.',
+                      description=('Shows how many pack and pool refreshes were requested, '
+                                   'how many were sent to Discord and the API calls saved.'))
+    @commands.is_owner()
+    async def render_stats(self, ctx):
+        await ctx.send(format_render_stats())
+
+    @commands.command(brief='Shows draft start DM stats.',
+                      description=('Shows how many DM calls were made at draft start, '
+                                   'how many were retried or failed, and how long '
+                                   'players waited for their first pack.'))
+    @commands.is_owner()
+    async def dm_stats(self, ctx):
+        await ctx.send(self.fanout.format_stats())
+
+    @commands.command(brief='Shows latency and load metrics.',
+                      description=('Shows command latency, booster generation time, '
+                                   'pass-to-display latency, Discord API calls per pick, '
+                                   'event loop lag and counters for each running pod.'))
+    @commands.is_owner()
+    async def stats(self, ctx):
+        for chunk in chunk_lines(METRICS.summary() or ['No metrics yet.']):
+            await ctx.send(f'```\n{chunk}```')
+
+    @commands.command(brief='Profiles a draft pod.',
+                      description=('Captures cProfile and tracemalloc data for draft_id '
+                                   'until the draft finishes, then writes a profile dump '
+                                   'and an allocation report to disk.\n'
+                                   'Add "stop" after draft_id to write them out early.'))
+    @commands.is_owner()
+    async def profile(self, ctx, draft_id, action=''):
+        curr_draft = self.find_draft(draft_id.upper())
+        if not curr_draft:
+            await ctx.send('No such draft.')
+            return
+
+        if action.lower() == 'stop':
+            if not curr_draft.profiler:
+                await ctx.send(f'Draft {curr_draft.id} is not being profiled.')
+                return
+
+            stem = await self.finish_profile(curr_draft)
+            if stem:
+                await ctx.send(f'Wrote {stem}.prof and {stem}-report.txt.')
+            else:
+                await ctx.send('Could not write the profile, see the log.')
+            return
+
+        if self.shards:
+            await ctx.send('Pods run in draft worker processes and cannot be profiled from here.')
+            return
+        if self.profiler:
+            await ctx.send(f'Already profiling draft {self.profiler.pod_id}.')
+            return
+
+        self.start_profile(curr_draft)
+        await ctx.send(f'Profiling draft {curr_draft.id} until it finishes.')
+
+    @commands.command(brief='Restarts a draft worker process.',
+                      description=('Moves the pods running on worker_id to the other '
+                                   'workers, restarts it and rebalances pods back onto it.'))
+    @commands.is_owner()
+    async def restart_worker(self, ctx, worker_id: int):
+        if not self.shards or worker_id not in self.shards.worker_ids:
+            await ctx.send('No such draft worker.')
+            return
+
+        await self.shards.restart_worker(worker_id)
+        await ctx.send(f'Restarted draft worker {worker_id}.')
+
+    @commands.group(brief='Manages draft formats.',
+                    description=('Lists the formats drafts can be created in. '
+                                 'Use !sets add and !sets remove to change them.'),
+                    invoke_without_command=True)
+    @commands.is_owner()
+    async def sets(self, ctx):
+        await ctx.send(f'Formats: {", ".join(sorted(SUPPORTED_FORMATS))}')
+
+    @sets.command(name='add',
+                  brief='Adds a draft format.',
+                  description=('Downloads the MTGJSON file for mtg_set, checks its '
+                               'booster data and makes it available for new drafts '
+                               'without a restart. icon_url sets the signup thumbnail.'))
+    @commands.is_owner()
+    async def sets_add(self, ctx, mtg_set, icon_url=None):
+        mtg_set = mtg_set.upper()
+        await ctx.send(f'Fetching {mtg_set}...')
+
+        # Parsing, compiling and building sampling tables stays off the event loop.
+        loop = asyncio.get_running_loop()
+        try:
+            info = await loop.run_in_executor(self.pack_pool.executor, prepare_set,
+                                              SET_SOURCE, mtg_set)
+        except (OSError, ValueError) as e:
+            await ctx.send(f'Could not add {mtg_set}: {e}')
+            return
+
+        register_format(mtg_set, icon_url)
+        self.pack_pool.add_set(mtg_set)
+        self.pack_pool.check_refill(mtg_set)
+
+        await ctx.send(f'Added {info["name"]} ({mtg_set}): {info["cards"]} cards, '
+                       f'{info["sheets"]} booster sheets.')
+
+    @sets.command(name='remove',
+                  brief='Removes a draft format.',
+                  description=('Stops new drafts from using mtg_set. Drafts already '
+                               'running are not affected.'))
+    @commands.is_owner()
+    async def sets_remove(self, ctx, mtg_set):
+        mtg_set = mtg_set.upper()
+        if mtg_set not in SUPPORTED_FORMATS:
+            await ctx.send(f'{mtg_set} is not a draft format.')
+            return
+
+        unregister_format(mtg_set)
+        self.pack_pool.remove_set(mtg_set)
+        await ctx.send(f'Removed {mtg_set}.')
+
+    @commands.command(brief='Shows booster odds for a format.',
+                      description=('Simulates boosters of mtg_set and shows how many cards '
+                                   'of each rarity and color a pack has, how often mythics '
+                                   'and foils show up and the rarest cards.\n'
+                                   'Add a card name to see how often that card appears.'))
+    async def odds(self, ctx, mtg_set, *card):
+        mtg_set = mtg_set.upper()
+        if mtg_set not in SUPPORTED_FORMATS:
+            await ctx.send('Unsupported draft format.')
+            return
+
+        catalog = get_catalog(mtg_set)
+        name = None
+        if card:
+            matches = catalog.match_names(' '.join(card))
+            if not matches:
+                await ctx.send('Card not found.')
+                return
+            if len(matches) > 1:
+                await ctx.send(did_you_mean(catalog, matches))
+                return
+            name = matches[0]
+
+        if not self.odds_runner.cached(mtg_set):
+            await ctx.send(f'Simulating {ODDS_PACKS:,} {mtg_set} boosters...')
+        pack_odds = await self.odds_runner.odds(mtg_set)
+
+        if name:
+            await ctx.send(pack_odds.format_card(name))
+        else:
+            await ctx.send(f'```\n{pack_odds.format_summary()}```')
+
     # Commands during draft
 
     @commands.command(brief='Reserves a card during draft.',
                       description=('Reserves the card that matches card_no from a pack '
-                                   'to be automatically picked during a draft.\n'
-                                   'Currently irrelevant due to draft timers not '
-                                   'being implemented yet.'))
+                                   'to be automatically picked during a draft if the '
+                                   'pick timer runs out.'))
     @commands.dm_only()
     async def reserve(self, ctx, card_no):
         draft_id = self.player_in_draft(ctx.author)
@@ -248,7 +875,7 @@ class MTGDraftManager(commands.Cog):
             await ctx.send('Invalid pick!')
             return
 
-        card_names = await player.reserve(card_no)
+        card_names = player.reserve(card_no)
         card_names = '; '.join(card_names)
 
         await ctx.send(f'Currently reserved: {card_names}')
@@ -272,28 +899,39 @@ class MTGDraftManager(commands.Cog):
         try:
             card_no = int(card[0])
         except ValueError:
-            cardname = ''.join(card)
+            catalog = get_catalog(player.mtg_set)
 
-            card_found = False
-            for i, card in enumerate(player.curr_pack.cards):
-                if true_name(card['name']) == true_name(cardname):
-                    card_no = i + 1
-                    card_found = True
-                    break
+            # Only names in the current pack are candidates.
+            pack_names = {}
+            for i, pack_card in enumerate(player.curr_pack.cards):
+                pack_names.setdefault(true_name(pack_card['name']), i + 1)
 
-            if not card_found:
+            matches = catalog.match_names(' '.join(card), within=pack_names)
+            if not matches:
                 await ctx.send('Please enter a valid card.')
                 return
+            if len(matches) > 1:
+                await ctx.send(did_you_mean(catalog, matches))
+                return
+
+            card_no = pack_names[matches[0]]
 
         if (card_no < 1 or card_no > len(player.curr_pack.cards)):
             await ctx.send('Please enter a valid card.')
             return
         
-        card_name = await player.pick(card_no)
+        with METRICS.timed('pick_seconds'):
+            card_name = await player.pick(card_no)
+        try:
+            if card_name is None:
+                await ctx.send('Please enter a valid card.')
+                return
 
-        await ctx.send(f'Picked: {card_name}')
-        await player.show_pack()
-        player.waiting = False      # End of lock for race condition vs player.pack_runner
+            await ctx.send(f'Picked: {card_name}')
+            player.adapter.messages += 1
+            await player.show_pack()
+        finally:
+            player.finish_pick()
 
     @commands.command(brief='Displays the current pack.',
                       description=('Prints out the contents of the current pack '
@@ -305,19 +943,28 @@ class MTGDraftManager(commands.Cog):
             await ctx.send('You are not in a draft right now!')
             return
 
-        await self.drafts[draft_id].draft_table[ctx.author.id].show_pack()
+        await self.drafts[draft_id].draft_table[ctx.author.id].show_pack(resend=True)
 
     @commands.command(brief='Displays the drafted cardpool.',
                       description=('Shows the current pool of drafted cards '
-                                   'during a draft.'))
+                                   'during a draft.\n'
+                                   'Add number, color or rarity to change how the '
+                                   'pool is sorted, or pick for pick order.'))
     @commands.dm_only()
-    async def pool(self, ctx):
+    async def pool(self, ctx, order=''):
         draft_id = self.player_in_draft(ctx.author)
         if not draft_id:
             await ctx.send('You are not in a draft right now!')
             return
 
-        await self.drafts[draft_id].draft_table[ctx.author.id].show_pool()
+        player = self.drafts[draft_id].draft_table[ctx.author.id]
+        if order:
+            if order.lower() not in POOL_ORDERS:
+                await ctx.send(f'Sort orders: {", ".join(POOL_ORDERS)}')
+                return
+            player.adapter.pool_order = order.lower()
+
+        await player.show_pool(resend=True)
 
     @commands.command(brief='Displays a card.',
                       description='Shows a scryfall-esque box with the card\'s information.')
@@ -346,11 +993,14 @@ class MTGDraftManager(commands.Cog):
         except ValueError:
             cardname = ' '.join(card)
 
-        card_info = get_card(mtg_set, cardname)
+        catalog = get_catalog(mtg_set)
+        matches = catalog.match_names(cardname)
 
         msg = 'Card not found.'
-        if card_info:
-            coll_no = card_info['number']
+        if len(matches) > 1:
+            msg = did_you_mean(catalog, matches)
+        elif matches:
+            coll_no = catalog.name_index[matches[0]][0]['number']
             msg = f'https://scryfall.com/card/{mtg_set}/{coll_no}/?utm_source=discord'
 
         await ctx.send(msg)
@@ -369,192 +1019,120 @@ class Draft():
         self.table_size = table_size
         self.in_progress = False
         self.draft_table = {}
+        self.pod = None
+        self.bots = 0
+        self.profiler = None
+        self.sealed_packs = 0
 
-        self.done = asyncio.Queue()
+        self.embed = None
+        self.signup_renderer = None
 
+    def signup_embed(self):
+        display_names = [player.display_name for player in self.players]
+        if self.bots:
+            display_names.append(f'{self.bots} bot(s)')
+        self.embed['fields'][0]['value'] = format_names(display_names) or '(Nobody yet!)'
 
-class DraftPlayer():
-    def __init__(self, player, mtg_set, draft):
+        return discord.Embed.from_dict(self.embed)
+
+
+class DiscordAdapter(PlayerAdapter):
+    def __init__(self, player, fanout=None):
+        super().__init__()
         self.player = player
-        self.draft = draft
-        self.mtg_set = mtg_set
-        self.pack_q = asyncio.Queue()
-        self.next_round_q = asyncio.Queue()
-        self.done = False
-
-        self.left = None
-        self.right = None
-        self.curr_round = 1
-        self.sub_round = 0
-
-        self.curr_pack = None
-        self.pack_msg = None
-
-        self.reserved = []
-
-        self.pool = []
-        self.pool_msg = None
-
-        self.waiting = False
-        self.num_picks = 0
-        self.max_picks = 1
-        if self.mtg_set in ('CMR', 'BBD', '2XM'):
-            self.max_picks = 2
-
-    async def pack_runner(self):
-        while not self.done:
-            if not self.curr_pack and not self.waiting:
-                new_pack = await self.pack_q.get()
-                if new_pack.draft_round == self.curr_round:
-                    if len(new_pack.cards) == 0:
-                        continue
-                    self.curr_pack = new_pack
-                    self.sub_round += 1
-                    await self.show_pack()
-                else:
-                    await self.next_round_q.put(new_pack)
-                    continue
-            await asyncio.sleep(3)
+        self.fanout = fanout
+        self.pack_renderer = MessageRenderer(player, self.pack_embed, fanout=fanout,
+                                             on_render=self.pack_displayed)
+        self.pool_renderer = MessageRenderer(player, self.pool_embed)
+        self.pool_links = None
+        self.pool_order = 'pick'
+
+        self.displaying = None
+        self.messages = 0
+        self.autopicks = 0
+
+    @property
+    def api_calls(self):
+        return self.pack_renderer.api_calls + self.pool_renderer.api_calls + self.messages
+
+    async def show_pack(self, resend=False):
+        self.pack_renderer.request(resend)
+
+    async def show_pool(self, resend=False):
+        self.pool_renderer.request(resend)
+
+    async def autopicked(self, card_names):
+        self.autopicks += len(card_names)
+        self.messages += 1
+
+        card_names = '; '.join(card_names)
+        send = lambda: self.player.send(f'Time\'s up! Auto-picked: {card_names}')
+        try:
+            if self.fanout:
+                await self.fanout.call(send)
+            else:
+                await send()
+        except discord.HTTPException:
+            logging.getLogger('discord').exception(f'Failed to send autopick notice to {self.player}')
 
-    def set_neighbors(self, left, right):
-        self.left = left
-        self.right = right
+    def pack_displayed(self):
+        if self.displaying:
+            METRICS.observe('pass_to_display_seconds', time.perf_counter() - self.displaying)
+            self.displaying = None
 
-    async def show_pack(self):
+    def pack_embed(self):
+        seat = self.seat
         embed_cards = '(Awaiting next pack.)'
-        card_images = EMPTY_POOL_URL
+        card_images = [EMPTY_POOL_URL]
+
+        if seat.curr_pack:
+            if seat.curr_pack.passed_at:
+                self.displaying = seat.curr_pack.passed_at
+                seat.curr_pack.passed_at = None
 
-        if self.curr_pack:
             embed_cards = []
-            for i, card in enumerate(self.curr_pack.cards):
+            for i, card in enumerate(seat.curr_pack.cards):
                 cardname = card['name']
                 if card['is_foil']:
                     cardname += ' \*FOIL\*'
                 embed_cards.append(f'{i+1} : {cardname}')
             embed_cards = '\n'.join(embed_cards)
 
-            card_images = Booster.cardlist_to_scryfall(self.curr_pack.cards, self.mtg_set)
+            card_images = Booster.cardlist_to_scryfall(seat.curr_pack.cards, seat.mtg_set)
 
-        picks_left = self.max_picks - self.num_picks
-        embed_desc = f'Picks remaining: {picks_left}\n[Card images]({card_images})'
+        picks_left = seat.max_picks - seat.num_picks
+        embed_desc = f'Picks remaining: {picks_left}\n{format_image_links(card_images)}'
+        if seat.pod.pick_time:
+            embed_desc = f'Time per pick: {seat.pod.pick_time}s\n' + embed_desc
 
-        pack_embed = {'title': f'Pack {self.curr_round} Pick {self.sub_round}',
+        pack_embed = {'title': f'Pack {seat.curr_round} Pick {seat.sub_round}',
                       'description': embed_desc,
                       'fields': [{'name': 'CARDS', 'value': f'{embed_cards}'}
                                 ]}
         
-        await self.edit_pack_msg(discord.Embed.from_dict(pack_embed))
-
-    async def edit_pack_msg(self, pack_embed):
-        if not self.pack_msg:
-            self.pack_msg = await self.player.send(embed=pack_embed)
-        else:
-            await self.pack_msg.delete()
-            self.pack_msg = await self.player.send(embed=pack_embed)
-
-    def format_cardpool(self):
-        card_counts = {}
-        for card in self.pool:
-            coll_no = int(card['number'])
-
-            cardname = card['name']
-            if card['is_foil']:
-                cardname += ' \*FOIL\*'
-                coll_no += 0.5
-
-            if coll_no in card_counts:
-                card_counts[coll_no]['count'] += 1
-            else:
-                card_counts[coll_no] = {'count': 1, 'name': cardname}
-        
-        pool_str = ''
-        for _, card_info in card_counts.items():
-            count = card_info['count']
-            card_name = card_info['name']
-            pool_str += f'{count}x {card_name}\n'
+        return discord.Embed.from_dict(pack_embed)
 
-        return pool_str
+    def pool_embed(self):
+        seat = self.seat
 
-    async def show_pool(self):
-        card_images = Booster.cardlist_to_scryfall(self.pool, self.mtg_set)
+        # Pools only grow, so only the cards picked since the last render are added.
+        if not self.pool_links:
+            self.pool_links = ScryfallLinks(seat.mtg_set)
+        self.pool_links.extend(seat.pool[self.pool_links.count:])
+        card_images = self.pool_links.urls()
 
-        embed_cards = self.format_cardpool()
+        embed_cards = seat.format_cardpool(self.pool_order)
         if not embed_cards:
             embed_cards = '(No cards in pool yet)'
-            card_images = EMPTY_POOL_URL
+            card_images = [EMPTY_POOL_URL]
 
-        embed_desc = f'[Card images]({card_images})'
+        embed_desc = format_image_links(card_images)
         
         pool_embed = {'title': f'Draft Pool',
                       'description': embed_desc,
                       'fields': [{'name': 'CARDS', 'value': f'{embed_cards}'}
                                 ]}
+        if seat.pool:
+            pool_embed['fields'].append({'name': 'STATS', 'value': seat.pool.format_stats()})
 
-        await self.edit_pool_msg(discord.Embed.from_dict(pool_embed))
-
-    async def edit_pool_msg(self, pool_embed):
-        if not self.pool_msg:
-            self.pool_msg = await self.player.send(embed=pool_embed)
-        else:
-            await self.pool_msg.delete()
-            self.pool_msg = await self.player.send(embed=pool_embed)
-
-    def reserve(self, card_no):
-        max_reserve = 1
-        if self.mtg_set in ('CMR', 'BBD', '2XM'):
-            max_reserve = 2
-        
-        if len(self.reserved) >= max_reserve:
-            self.reserved.pop(0)
-        self.reserved.append(self.curr_pack.cards[card_no-1])
-
-        card_names = []
-        for card in self.reserved:
-            card_names.append(card['name'])
-        
-        return card_names
-
-    async def pick(self, card_no):
-        self.num_picks += 1
-        card_name = self.curr_pack.cards[card_no-1]['name']
-
-        self.pool.append(self.curr_pack.cards.pop(card_no-1))
-
-        if self.num_picks >= self.max_picks:
-            await self.pass_pack()
-
-        return card_name
-    
-    async def pass_pack(self):
-        self.reserved = []
-        self.num_picks = 0
-
-        if self.mtg_set == '2XM':
-            if self.sub_round == 1:
-                self.max_picks = 1
-            elif self.sub_round == 15:
-                self.max_picks = 2
-
-        to_neighbor = self.left
-        if self.curr_round % 2 == 0:
-            to_neighbor = self.right
-
-        await to_neighbor.pack_q.put(self.curr_pack)
-
-        if len(self.pool) >= self.curr_round * self.curr_pack.pack_size:
-            if self.curr_round == 3:
-                self.done = True
-                await self.draft.done.put('done')
-                return
-
-            self.curr_round += 1
-            self.sub_round = 0
-        
-            while not self.pack_q.empty():
-                self.next_round_q.put_nowait(self.pack_q.get_nowait())
-
-            self.pack_q = self.next_round_q
-            self.next_round_q = asyncio.Queue()
-        
-        self.waiting = True         # Start of lock for race condition vs player.pack_runner
-        self.curr_pack = None
\ No newline at end of file
+        return discord.Embed.from_dict(pool_embed)
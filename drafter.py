@@ -0,0 +1,90 @@
+import asyncio
+import json
+import numpy as np
+import os
+
+from catalog import get_catalog, true_name
+from constants import BOT_COLOR_COMMITMENT, MTG_COLORS, RATINGS_PATH
+from engine import PlayerAdapter
+
+
+RARITY_RATINGS = {'common': 1.0, 'uncommon': 2.0, 'rare': 3.0, 'mythic': 4.0}
+
+_models = {}
+
+
+def get_pick_model(mtg_set):
+    mtg_set = mtg_set.upper()
+    catalog = get_catalog(mtg_set)
+
+    model = _models.get(mtg_set)
+    if not model or model.catalog is not catalog:
+        model = PickModel(catalog)
+        _models[mtg_set] = model
+
+    return model
+
+
+class PickModel():
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.index = {card['uuid']: i for i, card in enumerate(catalog.cards)}
+
+        ratings = self.load_ratings(catalog.set)
+        self.ratings = np.ones(len(catalog.cards))
+        # Gold cards spread their weight over their colors so they don't outscore mono cards.
+        self.color_matrix = np.zeros((len(catalog.cards), len(MTG_COLORS)))
+        for i, card in enumerate(catalog.cards):
+            name = true_name(card['name'])
+            if name in ratings:
+                self.ratings[i] = ratings[name]
+            else:
+                self.ratings[i] = RARITY_RATINGS.get(card.get('rarity'), 1.0)
+
+            for color in card['colors']:
+                self.color_matrix[i, MTG_COLORS.index(color)] = 1.0 / len(card['colors'])
+
+    @staticmethod
+    def load_ratings(mtg_set):
+        path = f'{RATINGS_PATH}/{mtg_set}.json'
+        if not os.path.exists(path):
+            return {}
+
+        with open(path, encoding='UTF-8') as f:
+            return {true_name(name): rating for name, rating in json.load(f).items()}
+
+    def card_ids(self, cards):
+        return np.array([self.index[card['uuid']] for card in cards])
+
+    def choose(self, pack_ids, pool_colors, pool_size):
+        commitment = BOT_COLOR_COMMITMENT * pool_colors / max(1, pool_size)
+        scores = self.ratings[pack_ids] + self.color_matrix[pack_ids] @ commitment
+        return int(np.argmax(scores))
+
+
+class BotAdapter(PlayerAdapter):
+    def __init__(self, mtg_set):
+        super().__init__()
+        self.model = get_pick_model(mtg_set)
+        self.pool_colors = np.zeros(len(MTG_COLORS))
+        self.picking = False
+
+    async def show_pack(self, resend=False):
+        seat = self.seat
+        if self.picking:
+            return
+
+        self.picking = True
+        # Passing the pack ends the loop, so double-pick formats pick until max_picks.
+        while seat.curr_pack and seat.curr_pack.cards and not seat.done:
+            # Yield between picks so pods full of bots don't hog the event loop.
+            await asyncio.sleep(0)
+
+            pack_ids = self.model.card_ids(seat.curr_pack.cards)
+            choice = self.model.choose(pack_ids, self.pool_colors, len(seat.pool))
+            self.pool_colors += self.model.color_matrix[pack_ids[choice]]
+
+            await seat.pick(choice + 1)
+        self.picking = False
+
+        seat.finish_pick()
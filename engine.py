@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import random
+import time
+
+from cardpool import CardPool
+
+
+# Process-wide pick timer counters, also reported in the log on every expiry.
+TIMER_METRICS = {'expiries': 0, 'reserved_picks': 0, 'default_picks': 0}
+
+
+def collect_timer_metrics():
+    for counter, value in TIMER_METRICS.items():
+        yield f'timer_{counter}', 'counter', {}, value
+
+
+class PlayerAdapter():
+    # Receives display updates for one seat. Subclasses decide how a pack or pool
+    # is shown, and automated seats make their picks from show_pack.
+    def __init__(self):
+        self.seat = None
+
+    def attach(self, seat):
+        self.seat = seat
+
+    async def show_pack(self, resend=False):
+        pass
+
+    async def show_pool(self, resend=False):
+        pass
+
+    async def autopicked(self, card_names):
+        pass
+
+
+class RandomAdapter(PlayerAdapter):
+    # Scripted seat that takes a random card as soon as a pack is shown.
+    def __init__(self, rng=random):
+        super().__init__()
+        self.rng = rng
+        self.picking = False
+        self.pick_times = []
+        self.display_times = []
+
+    async def show_pack(self, resend=False):
+        seat = self.seat
+        if seat.curr_pack and seat.curr_pack.passed_at:
+            self.display_times.append(time.perf_counter() - seat.curr_pack.passed_at)
+            seat.curr_pack.passed_at = None
+        if self.picking:
+            return
+
+        self.picking = True
+        while seat.curr_pack and seat.curr_pack.cards and not seat.done:
+            card_no = self.rng.randint(1, len(seat.curr_pack.cards))
+
+            start = time.perf_counter()
+            await seat.pick(card_no)
+            self.pick_times.append(time.perf_counter() - start)
+        self.picking = False
+
+        seat.finish_pick()
+
+
+class Pod():
+    def __init__(self, mtg_set, pod_id=None, timer_wheel=None, pick_time=None):
+        self.mtg_set = mtg_set
+        self.id = pod_id
+        self.timer_wheel = timer_wheel
+        self.pick_time = pick_time
+        self.journal = None
+        self.seats = []
+        self.tasks = []
+        self.done = asyncio.Queue()
+
+    def add_seat(self, seat_id, adapter):
+        seat = DraftPlayer(seat_id, self.mtg_set, self, adapter)
+        self.seats.append(seat)
+        return seat
+
+    async def start(self, pod_packs):
+        # Seats pass left in odd rounds and right in even rounds, in seating order.
+        for i, seat in enumerate(self.seats):
+            seat.set_neighbors(self.seats[(i-1)%len(self.seats)],
+                               self.seats[(i+1)%len(self.seats)])
+
+        for seat, seat_packs in zip(self.seats, pod_packs):
+            self.tasks.append(asyncio.create_task(seat.pack_runner(),
+                                                  name=f'{self.id}_pack_q_{seat.id}'))
+
+            for give_pack in seat_packs:
+                await seat.pack_q.put(give_pack)
+
+    async def finished(self):
+        for _ in range(len(self.seats)):
+            await self.done.get()
+
+    async def run(self, pod_packs):
+        await self.start(pod_packs)
+        await self.finished()
+
+
+class DraftPlayer():
+    def __init__(self, seat_id, mtg_set, pod, adapter):
+        self.id = seat_id
+        self.pod = pod
+        self.mtg_set = mtg_set
+        self.pack_q = asyncio.Queue()
+        self.next_round_packs = []
+        self.done = False
+
+        self.left = None
+        self.right = None
+        self.curr_round = 1
+        self.sub_round = 0
+
+        self.curr_pack = None
+        self.reserved = []
+        self.pool = CardPool()
+        self.pick_timer = None
+
+        # Clear while a pack is out or a pick is still being displayed.
+        self.ready_for_pack = asyncio.Event()
+        self.ready_for_pack.set()
+        self.ready_at = 0.0
+        self.num_picks = 0
+        self.max_picks = 1
+        if self.mtg_set in ('CMR', 'BBD', '2XM'):
+            self.max_picks = 2
+
+        self.adapter = adapter
+        self.adapter.attach(self)
+
+    async def pack_runner(self):
+        while True:
+            await self.ready_for_pack.wait()
+            if self.done:
+                return
+
+            new_pack = await self.next_pack()
+            if new_pack.draft_round != self.curr_round:
+                self.next_round_packs.append(new_pack)
+                continue
+            if len(new_pack.cards) == 0:
+                continue
+
+            # A pack that waited on the seat's previous pick counts from when the seat was free.
+            if new_pack.passed_at and new_pack.passed_at < self.ready_at:
+                new_pack.passed_at = self.ready_at
+
+            self.ready_for_pack.clear()
+            self.curr_pack = new_pack
+            self.sub_round += 1
+            self.start_pick_timer()
+            await self.show_pack()
+
+    async def next_pack(self):
+        for i, pack in enumerate(self.next_round_packs):
+            if pack.draft_round == self.curr_round:
+                return self.next_round_packs.pop(i)
+
+        return await self.pack_q.get()
+
+    def finish_pick(self):
+        if (self.done or not self.curr_pack) and not self.ready_for_pack.is_set():
+            self.ready_at = time.perf_counter()
+            self.ready_for_pack.set()
+
+    def start_pick_timer(self):
+        self.stop_pick_timer()
+        if self.pod.timer_wheel and self.pod.pick_time:
+            self.pick_timer = self.pod.timer_wheel.schedule(self.pod.pick_time,
+                                                            self.pick_timer_expired)
+
+    def stop_pick_timer(self):
+        if self.pick_timer:
+            self.pick_timer.cancel()
+            self.pick_timer = None
+
+    def pick_timer_expired(self):
+        self.pick_timer = None
+        asyncio.create_task(self.autopick(), name=f'{self.pod.id}_autopick_{self.id}')
+
+    async def autopick(self):
+        if self.done or not self.curr_pack:
+            return
+
+        TIMER_METRICS['expiries'] += 1
+
+        # Take reserved cards first, then fall back to the first card in the pack.
+        card_names = []
+        curr_pack = self.curr_pack
+        while self.curr_pack is curr_pack and curr_pack.cards and not self.done:
+            reserved = [card for card in self.reserved if card in curr_pack.cards]
+            if reserved:
+                card_no = curr_pack.cards.index(reserved[0]) + 1
+                self.reserved.remove(reserved[0])
+                TIMER_METRICS['reserved_picks'] += 1
+            else:
+                card_no = 1
+                TIMER_METRICS['default_picks'] += 1
+
+            card_names.append(await self.pick(card_no))
+
+        logging.getLogger('discord').info(
+            f'Pick timer expired for seat {self.id} in pod {self.pod.id}, '
+            f'autopicked {"; ".join(card_names)} (expiries={TIMER_METRICS["expiries"]}, '
+            f'reserved={TIMER_METRICS["reserved_picks"]}, '
+            f'default={TIMER_METRICS["default_picks"]})')
+
+        try:
+            await self.adapter.autopicked(card_names)
+        finally:
+            try:
+                await self.show_pack()
+            finally:
+                self.finish_pick()
+
+    def set_neighbors(self, left, right):
+        self.left = left
+        self.right = right
+
+    async def show_pack(self, resend=False):
+        await self.adapter.show_pack(resend)
+
+    def format_cardpool(self, order='pick'):
+        return self.pool.format(order)
+
+    async def show_pool(self, resend=False):
+        await self.adapter.show_pool(resend)
+
+    def reserve(self, card_no):
+        max_reserve = 1
+        if self.mtg_set in ('CMR', 'BBD', '2XM'):
+            max_reserve = 2
+        
+        if len(self.reserved) >= max_reserve:
+            self.reserved.pop(0)
+        self.reserved.append(self.curr_pack.cards[card_no-1])
+
+        card_names = []
+        for card in self.reserved:
+            card_names.append(card['name'])
+        
+        return card_names
+
+    async def pick(self, card_no):
+        self.num_picks += 1
+        card_name = self.curr_pack.cards[card_no-1]['name']
+
+        card = self.curr_pack.cards.pop(card_no-1)
+        self.pool.append(card)
+        if self.pod.journal:
+            self.pod.journal.record_pick(self.pod.id, self.id, card)
+
+        if self.num_picks >= self.max_picks:
+            await self.pass_pack()
+        else:
+            self.start_pick_timer()
+
+        return card_name
+    
+    async def pass_pack(self):
+        self.stop_pick_timer()
+        self.reserved = []
+        self.num_picks = 0
+
+        if self.mtg_set == '2XM':
+            if self.sub_round == 1:
+                self.max_picks = 1
+            elif self.sub_round == 15:
+                self.max_picks = 2
+
+        to_neighbor = self.left
+        if self.curr_round % 2 == 0:
+            to_neighbor = self.right
+
+        self.curr_pack.passed_at = time.perf_counter()
+        await to_neighbor.pack_q.put(self.curr_pack)
+
+        if len(self.pool) >= self.curr_round * self.curr_pack.pack_size:
+            if self.curr_round == 3:
+                self.done = True
+                await self.pod.done.put(self.id)
+                return
+
+            self.curr_round += 1
+            self.sub_round = 0
+
+        # pack_runner waits for finish_pick before showing the next pack.
+        self.curr_pack = None
\ No newline at end of file
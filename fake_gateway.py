@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import random
+import time
+
+from engine import PlayerAdapter
+from shard import ShardCoordinator
+
+
+class FakePlayer(PlayerAdapter):
+    # Stands in for a Discord user: picks a random card whenever a pack shows up.
+    def __init__(self, rng, stats):
+        super().__init__()
+        self.rng = rng
+        self.stats = stats
+        self.picking = False
+
+    async def show_pack(self, resend=False):
+        if self.picking:
+            return
+
+        self.picking = True
+        while self.seat.curr_pack and self.seat.curr_pack.cards and not self.seat.done:
+            card_no = self.rng.randint(1, len(self.seat.curr_pack.cards))
+            if await self.seat.pick(card_no) is None:
+                break
+            self.stats['picks'] += 1
+        self.picking = False
+
+
+async def run_pod(shards, pod_id, mtg_set, humans, bots, rng, stats):
+    seating = [(seat_id, FakePlayer(rng, stats)) for seat_id in range(1, humans + 1)]
+    seating += [(-i, None) for i in range(1, bots + 1)]
+    rng.shuffle(seating)
+
+    pod = await shards.create_pod(pod_id, mtg_set, seating, None)
+    await pod.finished()
+
+    stats['pods'] += 1
+    return [len(seat.pool) for seat in pod.seats.values()]
+
+async def simulate(args):
+    rng = random.Random(args.seed)
+    stats = {'picks': 0, 'pods': 0}
+
+    shards = ShardCoordinator(args.workers)
+    shards.start()
+
+    start = time.perf_counter()
+    pods = [asyncio.create_task(run_pod(shards, f'P{i:04}', args.set, args.humans,
+                                        args.bots, rng, stats))
+            for i in range(args.pods)]
+
+    # Restart a worker mid-run to exercise pod migration.
+    if args.restart is not None:
+        await asyncio.sleep(args.restart_after)
+        moved = sum(1 for pod in shards.pods.values() if pod.worker_id == args.restart)
+        await shards.restart_worker(args.restart)
+        print(f'restarted worker {args.restart} with {moved} pods in flight')
+
+    pool_sizes = await asyncio.gather(*pods)
+    elapsed = time.perf_counter() - start
+
+    await shards.shutdown()
+
+    counts = {size for sizes in pool_sizes for size in sizes}
+    print(f'{args.set}: {stats["pods"]}/{args.pods} pods on {args.workers} workers, '
+          f'{stats["picks"]} human picks in {elapsed:.2f}s '
+          f'({stats["picks"] / elapsed:.0f} picks/s)')
+    print(f'    final pool sizes: {sorted(counts)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run sharded pods against worker processes '
+                                                 'with fake players instead of Discord.')
+    parser.add_argument('set', nargs='?', default='CMR')
+    parser.add_argument('--pods', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--humans', type=int, default=4)
+    parser.add_argument('--bots', type=int, default=4)
+    parser.add_argument('--restart', type=int, default=None)
+    parser.add_argument('--restart-after', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    args.set = args.set.upper()
+
+    asyncio.run(simulate(args))
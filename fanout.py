@@ -0,0 +1,84 @@
+import asyncio
+import discord
+import random
+
+from collections import deque
+
+from constants import DM_BACKOFF, DM_CONCURRENCY, DM_RETRIES
+from metrics import METRICS
+
+
+FANOUT_HISTORY = 100
+
+
+class FanOut():
+    # Bounds how many Discord API calls are in flight at once and retries the
+    # ones that fail with a rate limit or server error.
+    def __init__(self, limit=DM_CONCURRENCY, retries=DM_RETRIES, backoff=DM_BACKOFF, rate=None):
+        self.limit = limit
+        self.retries = retries
+        self.backoff = backoff
+        self.rate = rate
+        self.semaphore = None
+        self.next_slot = 0.0
+
+        self.stats = {'calls': 0, 'retries': 0, 'failures': 0}
+        self.first_pack_times = deque(maxlen=FANOUT_HISTORY)
+
+    async def call(self, make_call):
+        if not self.semaphore:
+            self.semaphore = asyncio.Semaphore(self.limit)
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore:
+                    await self.pace()
+                    self.stats['calls'] += 1
+                    with METRICS.timed('discord_api_seconds'):
+                        return await make_call()
+            except discord.Forbidden:
+                self.stats['failures'] += 1
+                raise
+            except (discord.HTTPException, asyncio.TimeoutError) as e:
+                status = getattr(e, 'status', 500)
+                if attempt == self.retries or (status < 500 and status != 429):
+                    self.stats['failures'] += 1
+                    raise
+
+            self.stats['retries'] += 1
+            await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+
+    async def pace(self):
+        # Calls claim evenly spaced start times when a rate (calls per second) is set.
+        if not self.rate:
+            return
+
+        now = asyncio.get_running_loop().time()
+        wait = self.next_slot - now
+        self.next_slot = max(now, self.next_slot) + 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def run(self, items, func):
+        # func(item) makes its own calls in order, so calls to one DM channel stay
+        # sequential while different players' channels proceed concurrently.
+        return await asyncio.gather(*[func(item) for item in items], return_exceptions=True)
+
+    def record_first_pack(self, elapsed):
+        self.first_pack_times.append(elapsed)
+        METRICS.observe('first_pack_seconds', elapsed)
+
+    def collect_metrics(self):
+        for stat, value in self.stats.items():
+            yield f'dm_{stat}', 'counter', {}, value
+
+    def format_stats(self):
+        times = sorted(self.first_pack_times)
+        first_pack = 'no drafts started yet'
+        if times:
+            first_pack = (f'p50 {times[len(times) // 2]:.2f}s, '
+                          f'max {times[-1]:.2f}s over {len(times)} drafts')
+
+        return (f'{self.stats["calls"]} DM calls, {self.stats["retries"]} retries, '
+                f'{self.stats["failures"]} failures\n'
+                f'Time to first pack: {first_pack}')
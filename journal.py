@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import sqlite3
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from booster import Booster
+from catalog import get_catalog
+from constants import JOURNAL_FLUSH, JOURNAL_PATH
+from engine import PlayerAdapter, Pod
+
+
+SCHEMA = ['CREATE TABLE IF NOT EXISTS pods (pod_id TEXT PRIMARY KEY, info TEXT)',
+          'CREATE TABLE IF NOT EXISTS packs (pod_id TEXT, seat_id INTEGER, '
+          'draft_round INTEGER, cards TEXT)',
+          'CREATE TABLE IF NOT EXISTS picks (id INTEGER PRIMARY KEY, pod_id TEXT, '
+          'seat_id INTEGER, uuid TEXT, foil INTEGER)',
+          'CREATE INDEX IF NOT EXISTS packs_pod_id ON packs (pod_id)',
+          'CREATE INDEX IF NOT EXISTS picks_pod_id ON picks (pod_id)']
+
+# A log that stops making progress for this many loop iterations is treated as done.
+REPLAY_STALL = 100
+
+
+class Journal():
+    # Append-only pick log. Records are queued in memory and written in batches
+    # from a single writer thread, so !pick never waits on the disk.
+    def __init__(self, path=JOURNAL_PATH, flush_interval=JOURNAL_FLUSH):
+        self.flush_interval = flush_interval
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.logger = logging.getLogger('discord')
+        self.pending = []
+        self.task = None
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+
+    def start(self):
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.run(), name='journal')
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+
+        batch = self.pending
+        self.pending = []
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self._write, batch)
+        except Exception:
+            self.logger.exception(f'Failed to write {len(batch)} journal records')
+
+    def _write(self, batch):
+        with self.conn:
+            for statement, params in batch:
+                self.conn.execute(statement, params)
+
+    def close(self):
+        if self.task:
+            self.task.cancel()
+        if self.pending:
+            self._write(self.pending)
+            self.pending = []
+        self.executor.shutdown(wait=True)
+        self.conn.close()
+
+    def record_pod(self, pod, pod_packs, info):
+        info = dict(info, mtg_set=pod.mtg_set, seats=[seat.id for seat in pod.seats],
+                    pick_time=pod.pick_time)
+        self.pending.append(('INSERT OR REPLACE INTO pods VALUES (?, ?)',
+                             (pod.id, json.dumps(info))))
+
+        for seat, seat_packs in zip(pod.seats, pod_packs):
+            for pack in seat_packs:
+                cards = [[card['uuid'], int(card['is_foil'])] for card in pack.cards]
+                self.pending.append(('INSERT INTO packs VALUES (?, ?, ?, ?)',
+                                     (pod.id, seat.id, pack.draft_round, json.dumps(cards))))
+
+    def record_pick(self, pod_id, seat_id, card):
+        self.pending.append(('INSERT INTO picks (pod_id, seat_id, uuid, foil) VALUES (?, ?, ?, ?)',
+                             (pod_id, seat_id, card['uuid'], int(card['is_foil']))))
+
+    def finish_pod(self, pod_id):
+        for table in ('pods', 'packs', 'picks'):
+            self.pending.append((f'DELETE FROM {table} WHERE pod_id = ?', (pod_id,)))
+
+    def load(self):
+        pods = {}
+        for pod_id, info in self.conn.execute('SELECT pod_id, info FROM pods'):
+            pods[pod_id] = {'id': pod_id, 'info': json.loads(info), 'packs': {}, 'picks': {}}
+
+        for pod_id, seat_id, draft_round, cards in self.conn.execute(
+                'SELECT pod_id, seat_id, draft_round, cards FROM packs ORDER BY rowid'):
+            if pod_id in pods:
+                pods[pod_id]['packs'].setdefault(seat_id, []).append((draft_round, json.loads(cards)))
+
+        for pod_id, seat_id, uuid, foil in self.conn.execute(
+                'SELECT pod_id, seat_id, uuid, foil FROM picks ORDER BY id'):
+            if pod_id in pods:
+                pods[pod_id]['picks'].setdefault(seat_id, []).append((uuid, bool(foil)))
+
+        return list(pods.values())
+
+
+class MemoryJournal():
+    # Same records as Journal, kept in memory so a pod can be exported and
+    # replayed somewhere else (see shard.py).
+    def __init__(self):
+        self.pods = {}
+
+    def record_pod(self, pod, pod_packs, info):
+        info = dict(info, mtg_set=pod.mtg_set, seats=[seat.id for seat in pod.seats],
+                    pick_time=pod.pick_time)
+        packs = {}
+        for seat, seat_packs in zip(pod.seats, pod_packs):
+            packs[seat.id] = [(pack.draft_round,
+                               [[card['uuid'], int(card['is_foil'])] for card in pack.cards])
+                              for pack in seat_packs]
+
+        self.pods[pod.id] = {'id': pod.id, 'info': info, 'packs': packs, 'picks': {}}
+
+    def record_pick(self, pod_id, seat_id, card):
+        picks = self.pods[pod_id]['picks']
+        picks.setdefault(seat_id, []).append((card['uuid'], bool(card['is_foil'])))
+
+    def finish_pod(self, pod_id):
+        self.pods.pop(pod_id, None)
+
+    def export(self, pod_id):
+        return self.pods.pop(pod_id)
+
+    def load_record(self, record):
+        self.pods[record['id']] = record
+
+
+class ReplayAdapter(PlayerAdapter):
+    # Re-applies a seat's logged picks in order, then hands the seat back to `live`.
+    def __init__(self, picks, live):
+        super().__init__()
+        self.picks = deque(picks)
+        self.live = live
+        self.picking = False
+
+    def attach(self, seat):
+        super().attach(seat)
+        self.live.attach(seat)
+
+    async def show_pack(self, resend=False):
+        seat = self.seat
+        if self.picking:
+            return
+
+        self.picking = True
+        while self.picks and seat.curr_pack and not seat.done:
+            uuid, foil = self.picks.popleft()
+            for i, card in enumerate(seat.curr_pack.cards):
+                if card['uuid'] == uuid and card['is_foil'] == foil:
+                    await seat.pick(i + 1)
+                    break
+        self.picking = False
+
+        seat.finish_pick()
+
+
+def build_pack(catalog, draft_round, cards):
+    pack_list = []
+    for uuid, foil in cards:
+        pack_list.append(catalog.card(uuid, foil))
+
+    return Booster(catalog.set, draft_round=draft_round, cards=pack_list)
+
+async def restore_pod(record, adapters, timer_wheel=None, journal=None):
+    info = record['info']
+    catalog = get_catalog(info['mtg_set'])
+
+    pod = Pod(info['mtg_set'], record['id'])
+    replayers = []
+    for seat_id in info['seats']:
+        replayer = ReplayAdapter(record['picks'].get(seat_id, []), adapters[seat_id])
+        pod.add_seat(seat_id, replayer)
+        replayers.append(replayer)
+
+    pod_packs = [[build_pack(catalog, draft_round, cards)
+                  for draft_round, cards in record['packs'].get(seat_id, [])]
+                 for seat_id in info['seats']]
+    await pod.start(pod_packs)
+
+    # Let the pack runners work through the log until every pick is applied.
+    stalled = 0
+    remaining = sum(len(replayer.picks) for replayer in replayers)
+    while remaining and stalled < REPLAY_STALL:
+        await asyncio.sleep(0)
+        left = sum(len(replayer.picks) for replayer in replayers)
+        stalled = stalled + 1 if left == remaining else 0
+        remaining = left
+
+    # Picks made once the live adapters take over are logged as usual.
+    pod.journal = journal
+    pod.timer_wheel = timer_wheel
+    pod.pick_time = info['pick_time']
+    for seat, replayer in zip(pod.seats, replayers):
+        seat.adapter = replayer.live
+        if seat.curr_pack and not seat.done:
+            seat.start_pick_timer()
+            await seat.show_pack(resend=True)
+
+    return pod
@@ -0,0 +1,111 @@
+import asyncio
+import discord
+import itertools
+
+from constants import LOBBY_DEBOUNCE, QUEUE_BATCH, QUEUE_POD_SIZE, SUPPORTED_FORMATS
+from render import MessageRenderer
+
+
+def format_names(names, limit=1000):
+    shown = []
+    length = 0
+    for name in names:
+        length += len(name) + 2
+        if length > limit:
+            shown.append(f'and {len(names) - len(shown)} more')
+            break
+        shown.append(name)
+    return ', '.join(shown)
+
+
+class Lobby():
+    # Players waiting for a pod in one format, in join order. The status
+    # message is re-rendered at most once per debounce window however many
+    # players join or leave in it.
+    def __init__(self, mtg_set, channel, pod_size=QUEUE_POD_SIZE, debounce=LOBBY_DEBOUNCE,
+                 fanout=None):
+        self.mtg_set = mtg_set
+        self.channel = channel
+        self.pod_size = pod_size
+        self.waiting = {}           # user id -> user, oldest first
+        self.pods_formed = 0
+        self.renderer = MessageRenderer(channel, self.embed, debounce, fanout, edit_only=True)
+
+    def embed(self):
+        names = [player.display_name for player in self.waiting.values()]
+        lobby_embed = {'title': f'{self.mtg_set} Draft Queue',
+                       'description': (f'Join with !queue {self.mtg_set}, leave with !leave_queue.\n'
+                                       f'A pod fires every {self.pod_size} players.'),
+                       'fields': [{'name': f'Waiting ({len(names)})',
+                                   'value': format_names(names) or '(Nobody yet!)'},
+                                  {'name': 'Pods Formed', 'value': f'{self.pods_formed}'}
+                                 ]}
+        if SUPPORTED_FORMATS.get(self.mtg_set):
+            lobby_embed['thumbnail'] = {'url': SUPPORTED_FORMATS[self.mtg_set]}
+
+        return discord.Embed.from_dict(lobby_embed)
+
+
+class Matchmaker():
+    # Per-format queues. Joining and leaving are dict operations; pods are formed
+    # a moment after the queue first has enough players, so a burst of joins is
+    # handled in one pass. form_pod(lobby, players) is called with each full pod.
+    def __init__(self, form_pod, pod_size=QUEUE_POD_SIZE, batch=QUEUE_BATCH, fanout=None):
+        self.form_pod = form_pod
+        self.fanout = fanout
+        self.pod_size = pod_size
+        self.batch = batch
+        self.lobbies = {}
+        self.queued = {}            # user id -> format, until the player's pod is set up
+        self.scheduled = set()
+
+    def is_queued(self, player):
+        return player.id in self.queued
+
+    def join(self, player, mtg_set, channel):
+        lobby = self.lobbies.get(mtg_set)
+        if not lobby:
+            lobby = self.lobbies[mtg_set] = Lobby(mtg_set, channel, self.pod_size,
+                                                  fanout=self.fanout)
+
+        lobby.waiting[player.id] = player
+        self.queued[player.id] = mtg_set
+        lobby.renderer.request()
+
+        if len(lobby.waiting) >= self.pod_size and mtg_set not in self.scheduled:
+            self.scheduled.add(mtg_set)
+            asyncio.get_running_loop().call_later(self.batch, self.form_pods, mtg_set)
+
+        return lobby
+
+    def leave(self, player):
+        mtg_set = self.queued.get(player.id)
+        lobby = self.lobbies.get(mtg_set)
+        if not lobby or lobby.waiting.pop(player.id, None) is None:
+            # Already taken into a pod that is still being set up.
+            return None
+
+        del self.queued[player.id]
+        lobby.renderer.request()
+        return mtg_set
+
+    def release(self, players):
+        for player in players:
+            self.queued.pop(player.id, None)
+
+    def form_pods(self, mtg_set):
+        self.scheduled.discard(mtg_set)
+        lobby = self.lobbies[mtg_set]
+
+        while len(lobby.waiting) >= self.pod_size:
+            pod_ids = list(itertools.islice(lobby.waiting, self.pod_size))
+            players = [lobby.waiting.pop(player_id) for player_id in pod_ids]
+            lobby.pods_formed += 1
+            self.form_pod(lobby, players)
+
+        lobby.renderer.request()
+
+    def format_queues(self):
+        counts = [f'{mtg_set}: {len(lobby.waiting)} waiting'
+                  for mtg_set, lobby in sorted(self.lobbies.items()) if lobby.waiting]
+        return '\n'.join(counts) or 'Nobody is queued.'
@@ -0,0 +1,249 @@
+import asyncio
+import bisect
+import logging
+import os
+import time
+
+from contextlib import contextmanager
+
+from constants import (LOOP_LAG_INTERVAL, METRICS_HOST, METRICS_INTERVAL, METRICS_PATH,
+                       METRICS_PORT)
+
+
+METRICS_PREFIX = 'draftbot_'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RATIO_BUCKETS = (0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 6.0, 8.0)
+
+
+def _label_str(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _short_labels(labels):
+    if not labels:
+        return ''
+    return '[' + ','.join(str(value) for _, value in labels) + ']'
+
+
+class Histogram():
+    # Fixed buckets, so an observation is a bisect and a few additions.
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        # Upper bound of the bucket the quantile falls in, capped at the largest value seen.
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics():
+    # Process-wide histograms and counters, keyed by name and label values.
+    # Collectors are called at export time for values other modules already keep.
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.collectors = []
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextmanager
+    def timed(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, collector):
+        # collector() yields (name, type, labels dict, value) tuples.
+        self.collectors.append(collector)
+
+    def remove_collector(self, collector):
+        if collector in self.collectors:
+            self.collectors.remove(collector)
+
+    def collect(self):
+        samples = []
+        for collector in self.collectors:
+            try:
+                samples += [(name, kind, tuple(sorted(labels.items())), value)
+                            for name, kind, labels, value in collector()]
+            except Exception:
+                logging.getLogger('discord').exception('Metrics collector failed')
+        return samples
+
+    def prometheus(self):
+        lines = []
+        typed = set()
+
+        def _type(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {METRICS_PREFIX}{name} {kind}')
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            _type(name, 'histogram')
+            full_name = METRICS_PREFIX + name
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{full_name}_bucket{_label_str(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{full_name}_bucket{_label_str(labels, [("le", "+Inf")])} {histogram.count}')
+            lines.append(f'{full_name}_sum{_label_str(labels)} {histogram.sum}')
+            lines.append(f'{full_name}_count{_label_str(labels)} {histogram.count}')
+
+        for (name, labels), value in sorted(self.counters.items()):
+            _type(name, 'counter')
+            lines.append(f'{METRICS_PREFIX}{name}{_label_str(labels)} {value}')
+
+        for name, kind, labels, value in sorted(self.collect()):
+            _type(name, kind)
+            lines.append(f'{METRICS_PREFIX}{name}{_label_str(labels)} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        # Condensed view for !stats: one line per histogram and counter.
+        lines = []
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            label_str = _short_labels(labels)
+            scale, unit = (1000, 'ms') if name.endswith('_seconds') else (1, '')
+            lines.append(f'{name}{label_str}: n={histogram.count} '
+                         f'p50={histogram.quantile(0.5) * scale:.1f}{unit} '
+                         f'p99={histogram.quantile(0.99) * scale:.1f}{unit} '
+                         f'max={histogram.max * scale:.1f}{unit}')
+
+        for (name, labels), value in sorted(self.counters.items()):
+            label_str = _short_labels(labels)
+            lines.append(f'{name}{label_str}: {value}')
+
+        for name, _, labels, value in sorted(self.collect()):
+            label_str = _short_labels(labels)
+            lines.append(f'{name}{label_str}: {value}')
+
+        return lines
+
+
+METRICS = Metrics()
+
+
+class LoopMonitor():
+    # Sleeps for a fixed interval and records how late it wakes up, which is
+    # how long something else held the event loop.
+    def __init__(self, metrics=METRICS, interval=LOOP_LAG_INTERVAL):
+        self.metrics = metrics
+        self.interval = interval
+        self.task = None
+
+    def start(self):
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.run(), name='loop_monitor')
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.metrics.observe('event_loop_lag_seconds', max(0.0, loop.time() - expected))
+
+
+class MetricsExporter():
+    # Writes the Prometheus text format to a file every interval, and serves it
+    # over HTTP as well when a port is set.
+    def __init__(self, metrics=METRICS, path=METRICS_PATH, port=METRICS_PORT,
+                 host=METRICS_HOST, interval=METRICS_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self.logger = logging.getLogger('discord')
+        self.task = None
+        self.server = None
+
+    def start(self):
+        if self.path and (not self.task or self.task.done()):
+            self.task = asyncio.create_task(self.run(), name='metrics_exporter')
+        if self.port and not self.server:
+            asyncio.create_task(self.serve(), name='metrics_server')
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+        if self.server:
+            self.server.close()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.write()
+            except OSError:
+                self.logger.exception(f'Failed to write metrics to {self.path}')
+
+    def write(self):
+        with open(f'{self.path}.tmp', 'w', encoding='UTF-8') as f:
+            f.write(self.metrics.prometheus())
+        os.replace(f'{self.path}.tmp', self.path)
+
+    async def serve(self):
+        try:
+            self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        except OSError:
+            self.logger.exception(f'Failed to serve metrics on {self.host}:{self.port}')
+            return
+        self.logger.info(f'Serving metrics on http://{self.host}:{self.port}/metrics')
+
+    async def handle(self, reader, writer):
+        try:
+            await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=5)
+            body = self.metrics.prometheus().encode()
+            writer.write(b'HTTP/1.1 200 OK\r\n'
+                         b'Content-Type: text/plain; version=0.0.4\r\n'
+                         b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+                         b'Connection: close\r\n\r\n' + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
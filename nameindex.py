@@ -0,0 +1,114 @@
+import bisect
+
+
+def _trigrams(name):
+    padded = f'$${name}$'
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+def _is_abbreviation(query, name):
+    # Every letter of the query appears in order, starting with the first one.
+    if not name.startswith(query[0]):
+        return False
+
+    i = 0
+    for char in name:
+        if char == query[i]:
+            i += 1
+            if i == len(query):
+                return True
+    return False
+
+def edit_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    prev = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        curr = [i]
+        for j, char_b in enumerate(b, 1):
+            curr.append(min(prev[j] + 1, curr[j-1] + 1, prev[j-1] + (char_a != char_b)))
+        if min(curr) > limit:
+            return limit + 1
+        prev = curr
+
+    return prev[-1]
+
+
+class NameIndex():
+    # Card names normalized with true_name, matched by exact name, prefix, word
+    # prefix, abbreviation and then small typos, stopping at the first tier
+    # that finds anything.
+    def __init__(self, name_words):
+        # name_words maps each normalized name to the normalized words in it.
+        self.names = sorted(name_words)
+        self.name_set = set(self.names)
+        self.word_starts = sorted((word, name) for name, words in name_words.items()
+                                  for word in words[1:])
+
+        self.by_initial = {}
+        self.trigrams = {}
+        for name in self.names:
+            self.by_initial.setdefault(name[0], []).append(name)
+            for gram in _trigrams(name):
+                self.trigrams.setdefault(gram, []).append(name)
+
+    def starting_with(self, query):
+        matches = []
+        i = bisect.bisect_left(self.names, query)
+        while i < len(self.names) and self.names[i].startswith(query):
+            matches.append(self.names[i])
+            i += 1
+        return matches
+
+    def word_starting_with(self, query):
+        matches = set()
+        i = bisect.bisect_left(self.word_starts, (query,))
+        while i < len(self.word_starts) and self.word_starts[i][0].startswith(query):
+            matches.add(self.word_starts[i][1])
+            i += 1
+        return matches
+
+    def fuzzy_candidates(self, query, count=20):
+        shared = {}
+        for gram in _trigrams(query):
+            for name in self.trigrams.get(gram, ()):
+                shared[name] = shared.get(name, 0) + 1
+
+        return sorted(shared, key=shared.get, reverse=True)[:count]
+
+    def fuzzy(self, query, candidates):
+        limit = max(1, len(query) // 4)
+
+        best = []
+        best_distance = limit + 1
+        for name in candidates:
+            distance = edit_distance(query, name, limit)
+            if distance < best_distance:
+                best, best_distance = [name], distance
+            elif distance == best_distance and distance <= limit:
+                best.append(name)
+        return best
+
+    def match(self, query, within=None):
+        # `within` limits matches to a few names, such as those in the current pack.
+        if not query:
+            return []
+
+        restricted = within is not None
+        if not restricted:
+            within = self.name_set
+
+        if query in within:
+            return [query]
+
+        matches = [name for name in self.starting_with(query) if name in within]
+        if not matches:
+            matches = [name for name in self.word_starting_with(query) if name in within]
+        if not matches:
+            pool = within if restricted else self.by_initial.get(query[0], [])
+            matches = [name for name in pool if _is_abbreviation(query, name)]
+        if not matches:
+            pool = within if restricted else self.fuzzy_candidates(query)
+            matches = self.fuzzy(query, pool)
+
+        return sorted(matches)
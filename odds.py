@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import numpy as np
+import time
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from booster import Booster
+from catalog import get_catalog, set_version, true_name
+from constants import MTG_COLORS, ODDS_CACHE_SIZE, ODDS_CHUNK, ODDS_PACKS, ODDS_WORKERS
+from setpack import RARITIES
+
+
+def chunk_sizes(packs, chunk=ODDS_CHUNK):
+    sizes = [chunk] * (packs // chunk)
+    if packs % chunk:
+        sizes.append(packs % chunk)
+    return sizes
+
+def simulate_chunk(mtg_set, packs, seed=None):
+    # Counts rather than cards: copies of every catalog card, split by foil,
+    # and how many packs held at least one card of each rarity or a foil.
+    catalog = get_catalog(mtg_set)
+    rng = np.random.default_rng(seed)
+    all_sheets = catalog.booster_info['sheets']
+    rarities = np.array([RARITIES.index(card.get('rarity', 'common')) for card in catalog.cards])
+
+    copies = np.zeros((2, len(catalog.cards)), dtype=np.int64)
+    pack_rarities = np.zeros((packs, len(RARITIES)), dtype=np.int32)
+    pack_foils = np.zeros(packs, dtype=np.int32)
+    for pack_nos, sheet, card_ids in Booster.sample_sheets(catalog, packs, rng):
+        foil = int(bool(all_sheets[sheet]['foil']))
+        copies[foil] += np.bincount(card_ids.ravel(), minlength=len(catalog.cards))
+        if foil:
+            pack_foils[pack_nos] += card_ids.shape[1]
+
+        sheet_rarities = rarities[card_ids]
+        for rarity in np.unique(sheet_rarities):
+            pack_rarities[pack_nos, rarity] += (sheet_rarities == rarity).sum(axis=1)
+
+    return {'packs': packs,
+            'copies': copies,
+            'rarity_packs': (pack_rarities > 0).sum(axis=0),
+            'foil_packs': int((pack_foils > 0).sum())}
+
+def merge_chunks(chunks):
+    return {'packs': sum(chunk['packs'] for chunk in chunks),
+            'copies': sum(chunk['copies'] for chunk in chunks),
+            'rarity_packs': sum(chunk['rarity_packs'] for chunk in chunks),
+            'foil_packs': sum(chunk['foil_packs'] for chunk in chunks)}
+
+
+class PackOdds():
+    # Rates per pack from a merged simulation, grouped by rarity, color and card name.
+    def __init__(self, catalog, result):
+        self.catalog = catalog
+        self.packs = result['packs']
+        self.copies = result['copies']
+        self.rarity_packs = result['rarity_packs']
+        self.foil_packs = result['foil_packs']
+
+        totals = self.copies.sum(axis=0)
+        self.by_rarity = dict.fromkeys(RARITIES, 0)
+        self.by_color = {color: dict.fromkeys(RARITIES, 0) for color in MTG_COLORS + ['C']}
+        self.by_name = {}
+        for card, count in zip(catalog.cards, totals.tolist()):
+            rarity = card.get('rarity', 'common')
+            self.by_rarity[rarity] += count
+            for color in card['colors'] or ['C']:
+                self.by_color[color][rarity] += count
+
+            name = true_name(card['name'])
+            self.by_name[name] = self.by_name.get(name, 0) + count
+
+        self.foil_by_name = {}
+        for card, count in zip(catalog.cards, self.copies[1].tolist()):
+            name = true_name(card['name'])
+            self.foil_by_name[name] = self.foil_by_name.get(name, 0) + count
+
+    def rarities(self):
+        return [rarity for rarity in RARITIES if self.by_rarity[rarity]]
+
+    def format_summary(self, top=5):
+        rarities = self.rarities()
+        packs = self.packs
+        lines = [f'{self.catalog.set}: {packs:,} simulated boosters',
+                 'Per pack: ' + ', '.join(f'{self.by_rarity[rarity] / packs:.2f} {rarity}'
+                                          for rarity in rarities),
+                 'At least one: ' + ', '.join(f'{rarity} {self.rarity_packs[RARITIES.index(rarity)] / packs:.1%}'
+                                              for rarity in rarities)
+                 + f', foil {self.foil_packs / packs:.1%}',
+                 f'Foils per pack: {self.copies[1].sum() / packs:.2f}',
+                 '',
+                 'Per pack by color (' + '/'.join(rarity[0].upper() for rarity in rarities) + '):']
+        for color, counts in self.by_color.items():
+            if any(counts.values()):
+                lines.append(f'  {color}: ' + ' / '.join(f'{counts[rarity] / packs:.2f}'
+                                                         for rarity in rarities))
+
+        # Least likely cards first: those are what people ask about.
+        ranked = sorted((count, name) for name, count in self.by_name.items() if count)
+        lines.append('')
+        lines.append(f'Rarest {top} cards:')
+        for count, name in ranked[:top]:
+            lines.append(f'  {self.catalog.display_name(name)}: 1 in {packs / count:,.0f} packs')
+        missing = len(self.by_name) - len(ranked)
+        if missing:
+            lines.append(f'  ({missing} cards never appeared in boosters)')
+
+        return '\n'.join(lines)
+
+    def format_card(self, name):
+        count = self.by_name.get(name, 0)
+        display_name = self.catalog.display_name(name)
+        if not count:
+            return f'{display_name} did not appear in {self.packs:,} simulated boosters.'
+
+        foils = self.foil_by_name.get(name, 0)
+        return (f'{display_name}: {count / self.packs * 100:.2f} copies per 100 packs '
+                f'(1 in {self.packs / count:,.0f}), foil 1 in '
+                + (f'{self.packs / foils:,.0f}' if foils else 'never')
+                + f' over {self.packs:,} simulated boosters')
+
+
+def simulate(mtg_set, packs=ODDS_PACKS, workers=ODDS_WORKERS, seed=None, chunk=ODDS_CHUNK):
+    sizes = chunk_sizes(packs, chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = list(executor.map(simulate_chunk, [mtg_set] * len(sizes), sizes, seeds))
+
+    return PackOdds(get_catalog(mtg_set), merge_chunks(chunks))
+
+
+class OddsRunner():
+    # Simulations run in their own process pool. Results are kept per set file
+    # version, so repeat queries for an unchanged set are a dict lookup and
+    # concurrent queries share one run.
+    def __init__(self, workers=ODDS_WORKERS, chunk=ODDS_CHUNK, cache_size=ODDS_CACHE_SIZE):
+        self.workers = workers
+        self.chunk = chunk
+        self.cache_size = cache_size
+        self.executor = None
+        self.results = OrderedDict()
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def cached(self, mtg_set, packs=ODDS_PACKS):
+        task = self.results.get((mtg_set, set_version(mtg_set), packs))
+        return bool(task and task.done())
+
+    async def odds(self, mtg_set, packs=ODDS_PACKS):
+        key = (mtg_set, set_version(mtg_set), packs)
+        task = self.results.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.simulate(key))
+            self.results[key] = task
+            while len(self.results) > self.cache_size:
+                self.results.popitem(last=False)
+        self.results.move_to_end(key)
+
+        return await asyncio.shield(task)
+
+    async def simulate(self, key):
+        mtg_set, _, packs = key
+        if not self.executor:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        sizes = chunk_sizes(packs, self.chunk)
+        seeds = np.random.SeedSequence().spawn(len(sizes))
+        loop = asyncio.get_running_loop()
+        try:
+            chunks = await asyncio.gather(*[loop.run_in_executor(self.executor, simulate_chunk,
+                                                                 mtg_set, size, seed)
+                                            for size, seed in zip(sizes, seeds)])
+        except Exception:
+            self.results.pop(key, None)
+            raise
+
+        return PackOdds(get_catalog(mtg_set), merge_chunks(chunks))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate boosters and report pack odds.')
+    parser.add_argument('set')
+    parser.add_argument('card', nargs='*')
+    parser.add_argument('--packs', type=int, default=ODDS_PACKS)
+    parser.add_argument('--workers', type=int, default=ODDS_WORKERS)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    mtg_set = args.set.upper()
+    start = time.perf_counter()
+    pack_odds = simulate(mtg_set, args.packs, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+
+    if args.card:
+        matches = get_catalog(mtg_set).match_names(' '.join(args.card))
+        if not matches:
+            print('Card not found.')
+        for name in matches:
+            print(pack_odds.format_card(name))
+    else:
+        print(pack_odds.format_summary(args.top))
+    print(f'({args.packs:,} boosters in {elapsed:.2f}s, {args.packs / elapsed:,.0f} boosters/s)')
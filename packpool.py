@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import numpy as np
+import time
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from booster import Booster
+from constants import PACK_POOL_HIGH, PACK_POOL_LOW, PACK_POOL_WORKERS
+from metrics import METRICS
+
+
+REFILL_HISTORY = 100
+
+
+def generate_pool_packs(mtg_set, count):
+    # Fresh entropy per call so forked workers don't repeat each other's packs.
+    return Booster.generate_packs(mtg_set, count, np.random.default_rng())
+
+
+class PackPool():
+    def __init__(self, mtg_sets, low=PACK_POOL_LOW, high=PACK_POOL_HIGH,
+                 workers=PACK_POOL_WORKERS):
+        self.low = low
+        self.high = high
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.logger = logging.getLogger('discord')
+
+        self.ready = {}
+        self.refilling = set()
+        self.stats = {}
+        for mtg_set in mtg_sets:
+            self.add_set(mtg_set)
+
+    def add_set(self, mtg_set):
+        if mtg_set not in self.ready:
+            self.ready[mtg_set] = deque()
+            self.stats[mtg_set] = {'hits': 0,
+                                   'misses': 0,
+                                   'refills': deque(maxlen=REFILL_HISTORY)}
+
+    def remove_set(self, mtg_set):
+        # A refill already running finishes into the dropped deque.
+        self.ready.pop(mtg_set, None)
+        self.stats.pop(mtg_set, None)
+
+    def start(self):
+        for mtg_set in self.ready:
+            self.check_refill(mtg_set)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def check_refill(self, mtg_set):
+        if mtg_set in self.refilling or mtg_set not in self.ready:
+            return
+        if len(self.ready[mtg_set]) < self.low:
+            self.refilling.add(mtg_set)
+            asyncio.create_task(self.refill(mtg_set), name=f'pack_pool_{mtg_set}')
+
+    async def refill(self, mtg_set):
+        ready = self.ready[mtg_set]
+        stats = self.stats[mtg_set]
+        try:
+            needed = self.high - len(ready)
+            if needed > 0:
+                start = time.perf_counter()
+                loop = asyncio.get_running_loop()
+                pack_lists = await loop.run_in_executor(self.executor, generate_pool_packs,
+                                                        mtg_set, needed)
+                ready.extend(pack_lists)
+
+                elapsed = time.perf_counter() - start
+                stats['refills'].append(elapsed)
+                METRICS.observe('booster_generation_seconds', elapsed, set=mtg_set, path='refill')
+                METRICS.inc('boosters_generated', needed, set=mtg_set)
+        except Exception:
+            self.logger.exception(f'Failed to refill {mtg_set} pack pool')
+            return
+        finally:
+            self.refilling.discard(mtg_set)
+
+        self.check_refill(mtg_set)
+
+    async def take(self, mtg_set, count):
+        self.add_set(mtg_set)
+
+        ready = self.ready[mtg_set]
+        pack_lists = []
+        while ready and len(pack_lists) < count:
+            pack_lists.append(ready.popleft())
+
+        missing = count - len(pack_lists)
+        self.stats[mtg_set]['hits'] += len(pack_lists)
+        self.stats[mtg_set]['misses'] += missing
+        self.check_refill(mtg_set)
+
+        if missing:
+            with METRICS.timed('booster_generation_seconds', set=mtg_set, path='miss'):
+                loop = asyncio.get_running_loop()
+                pack_lists += await loop.run_in_executor(self.executor, generate_pool_packs,
+                                                         mtg_set, missing)
+            METRICS.inc('boosters_generated', missing, set=mtg_set)
+
+        return pack_lists
+
+    def collect_metrics(self):
+        for mtg_set, ready in self.ready.items():
+            yield 'pack_pool_ready', 'gauge', {'set': mtg_set}, len(ready)
+            yield 'pack_pool_hits', 'counter', {'set': mtg_set}, self.stats[mtg_set]['hits']
+            yield 'pack_pool_misses', 'counter', {'set': mtg_set}, self.stats[mtg_set]['misses']
+
+    def format_stats(self):
+        lines = []
+        for mtg_set, stats in self.stats.items():
+            served = stats['hits'] + stats['misses']
+            hit_rate = stats['hits'] / served if served else 0.0
+
+            refills = stats['refills']
+            refill_str = 'no refills yet'
+            if refills:
+                avg_ms = 1000 * sum(refills) / len(refills)
+                max_ms = 1000 * max(refills)
+                refill_str = f'refill avg {avg_ms:.0f}ms, max {max_ms:.0f}ms'
+
+            lines.append(f'{mtg_set}: {len(self.ready[mtg_set])} ready, '
+                         f'{hit_rate:.0%} hit rate ({stats["hits"]}/{served}), {refill_str}')
+
+        return '\n'.join(lines)
@@ -0,0 +1,138 @@
+import asyncio
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+
+from constants import PROFILE_PATH, PROFILE_TOP
+
+
+PROFILED_METHODS = ('pick', 'pass_pack', 'show_pack', 'show_pool', 'autopick',
+                    'reserve', 'finish_pick')
+
+
+class PodProfiler():
+    # cProfile and tracemalloc capture for one pod. Only that pod's seats get
+    # wrapped methods, so other pods, and every pod when nothing is being
+    # profiled, run the plain engine code.
+    def __init__(self, pod_id, path=PROFILE_PATH, top=PROFILE_TOP):
+        self.pod_id = pod_id
+        self.path = path
+        self.top = top
+        self.logger = logging.getLogger('discord')
+
+        self.profile = cProfile.Profile()
+        self.active = False
+        self.depth = 0
+        self.started_at = None
+        self.owns_tracing = False
+        self.snapshot = None
+
+    def start(self):
+        self.active = True
+        self.started_at = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.owns_tracing = True
+        self.snapshot = tracemalloc.take_snapshot()
+
+    def enter(self):
+        # Nested and overlapping captures share one enable/disable pair.
+        if not self.active:
+            return
+        if self.depth == 0:
+            self.profile.enable()
+        self.depth += 1
+
+    def exit(self):
+        if not self.active:
+            return
+        self.depth -= 1
+        if self.depth == 0:
+            self.profile.disable()
+
+    @contextmanager
+    def capture(self):
+        self.enter()
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def wrap(self, method):
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def wrapped(*args, **kwargs):
+                with self.capture():
+                    return await method(*args, **kwargs)
+        else:
+            @functools.wraps(method)
+            def wrapped(*args, **kwargs):
+                with self.capture():
+                    return method(*args, **kwargs)
+        return wrapped
+
+    def attach(self, pod):
+        for seat in pod.seats:
+            for name in PROFILED_METHODS:
+                setattr(seat, name, self.wrap(getattr(seat, name)))
+
+    def stop(self):
+        # Snapshots have to be taken on the loop thread; writing them out can happen elsewhere.
+        self.active = False
+        if self.depth:
+            self.profile.disable()
+            self.depth = 0
+
+        end_snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if self.owns_tracing:
+            tracemalloc.stop()
+            self.owns_tracing = False
+
+        return end_snapshot, peak
+
+    def write(self, end_snapshot, peak):
+        os.makedirs(self.path, exist_ok=True)
+        stem = f'{self.path}/{self.pod_id}-{time.strftime("%Y%m%d-%H%M%S")}'
+        self.profile.dump_stats(f'{stem}.prof')
+
+        ignored = [tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                   tracemalloc.Filter(False, '<unknown>')]
+        diffs = end_snapshot.filter_traces(ignored).compare_to(
+            self.snapshot.filter_traces(ignored), 'lineno')
+
+        calls = io.StringIO()
+        pstats.Stats(self.profile, stream=calls).sort_stats('cumulative').print_stats(self.top)
+
+        elapsed = time.perf_counter() - self.started_at
+        with open(f'{stem}-report.txt', 'w', encoding='UTF-8') as f:
+            f.write(f'Pod {self.pod_id}: profiled for {elapsed:.1f}s, '
+                    f'peak traced memory {peak / 1024:.0f} KiB (whole process)\n\n')
+            f.write(f'Top {self.top} allocation sites by growth while the pod ran:\n')
+            for diff in diffs[:self.top]:
+                f.write(f'{diff}\n')
+            f.write(f'\nTop {self.top} functions by cumulative time:\n')
+            f.write(calls.getvalue())
+
+        return stem
+
+    async def finish(self):
+        end_snapshot, peak = self.stop()
+        loop = asyncio.get_running_loop()
+        try:
+            stem = await loop.run_in_executor(None, self.write, end_snapshot, peak)
+        except OSError:
+            self.logger.exception(f'Failed to write profile for pod {self.pod_id}')
+            return None
+
+        self.logger.info(f'Wrote profile for pod {self.pod_id} to {stem}.prof '
+                         f'and {stem}-report.txt')
+        return stem
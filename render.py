@@ -0,0 +1,117 @@
+import asyncio
+import discord
+import logging
+
+from constants import RENDER_DEBOUNCE
+
+
+RENDER_TOTALS = {'requests': 0, 'renders': 0, 'api_calls': 0, 'legacy_calls': 0}
+
+
+class MessageRenderer():
+    def __init__(self, user, build_embed, debounce=RENDER_DEBOUNCE, fanout=None, on_render=None,
+                 msg=None, edit_only=False):
+        self.user = user
+        self.build_embed = build_embed
+        self.debounce = debounce
+        self.fanout = fanout
+        self.on_render = on_render
+        self.edit_only = edit_only
+        self.logger = logging.getLogger('discord')
+
+        self.msg = msg
+        self.dirty = False
+        self.resend = False
+        self.task = None
+        self.rendered = asyncio.Event()
+
+        self.requests = 0
+        self.renders = 0
+        self.api_calls = 0
+        self.legacy_calls = 0
+
+    @property
+    def calls_saved(self):
+        return self.legacy_calls - self.api_calls
+
+    def _count(self, counter, amount=1):
+        setattr(self, counter, getattr(self, counter) + amount)
+        RENDER_TOTALS[counter] += amount
+
+    async def call(self, make_call):
+        # A fanout only covers the first render, which goes out in the same burst
+        # as every other player's. Later edits are this channel's own traffic,
+        # except on edit-only messages, which rely on the fanout's retries.
+        if self.fanout and (self.edit_only or not self.rendered.is_set()):
+            return await self.fanout.call(make_call)
+        return await make_call()
+
+    def request(self, resend=False):
+        # Every refresh used to be a delete plus a send, or just a send the first time.
+        self._count('requests')
+        self._count('legacy_calls', 2 if self.requests > 1 else 1)
+
+        self.dirty = True
+        self.resend = self.resend or resend
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        # Render right away, then fold any requests made during the debounce
+        # window into a single trailing render.
+        while self.dirty:
+            self.dirty = False
+            try:
+                await self.render()
+                if self.on_render:
+                    self.on_render()
+            except Exception:
+                self.logger.exception(f'Failed to render message for {self.user}')
+            self.rendered.set()
+            await asyncio.sleep(self.debounce)
+
+    async def render(self):
+        embed = self.build_embed()
+        self._count('renders')
+
+        resend = self.resend
+        self.resend = False
+
+        if self.edit_only and self.msg:
+            # Signup and lobby messages are known by id, so a failed edit is
+            # logged and left for the next render rather than re-sent.
+            self._count('api_calls')
+            await self.call(lambda: self.msg.edit(embed=embed))
+            return
+
+        if self.msg and not resend:
+            try:
+                self._count('api_calls')
+                await self.call(lambda: self.msg.edit(embed=embed))
+                return
+            except discord.NotFound:
+                self.msg = None
+            except discord.HTTPException:
+                pass
+
+        if self.msg:
+            try:
+                self._count('api_calls')
+                await self.call(self.msg.delete)
+            except discord.HTTPException:
+                pass
+
+        self._count('api_calls')
+        self.msg = await self.call(lambda: self.user.send(embed=embed))
+
+
+def collect_render_metrics():
+    for counter, value in RENDER_TOTALS.items():
+        yield f'render_{counter}', 'counter', {}, value
+
+def format_render_stats():
+    saved = RENDER_TOTALS['legacy_calls'] - RENDER_TOTALS['api_calls']
+    return (f'{RENDER_TOTALS["requests"]} refreshes requested, '
+            f'{RENDER_TOTALS["renders"]} rendered, '
+            f'{RENDER_TOTALS["api_calls"]} API calls made, '
+            f'{saved} API calls saved')
@@ -0,0 +1,113 @@
+import numpy as np
+
+from constants import BALANCE_BATCH, MTG_COLORS
+
+
+# Balanced sheets need between these many mono-colored cards of every color.
+BALANCE_MIN = 1
+BALANCE_MAX = 4
+
+
+class SheetSampler():
+    def __init__(self, sheet_cards, card_colors=None, alias=None):
+        self.uuids = np.array(list(sheet_cards.keys()))
+        weights = np.array(list(sheet_cards.values()), dtype=float)
+
+        self.size = len(self.uuids)
+        self.inv_weights = 1.0 / weights
+        # Compiled set packs carry the alias table; JSON sets build it here.
+        if alias is None:
+            alias = self.build_alias(weights)
+        self.alias_prob, self.alias = alias
+
+        # One row per card, with a single 1 in the column of mono-colored cards.
+        self.color_matrix = np.zeros((self.size, len(MTG_COLORS)), dtype=np.int8)
+        if card_colors:
+            for i, colors in enumerate(card_colors):
+                if len(colors) == 1:
+                    self.color_matrix[i, MTG_COLORS.index(colors[0])] = 1
+
+        self.balance_attempts = 0
+        self.balanced_packs = 0
+
+    @staticmethod
+    def build_alias(weights):
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+        prob = np.ones(n)
+        alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+
+        return prob, alias
+
+    def draw(self, count, rng=np.random):
+        u = rng.random(count)
+        v = rng.random(count)
+        i = (u * self.size).astype(np.intp)
+        return np.where(v < self.alias_prob[i], i, self.alias[i])
+
+    def _top_keys(self, count, size, rng):
+        # Exponential keys (Efraimidis-Spirakis): the top `size` keys of a row are a
+        # weighted draw without replacement, same as successive np.random.choice.
+        keys = np.log(rng.random((count, self.size))) * self.inv_weights
+        top = np.argpartition(keys, -size, axis=1)[:, -size:]
+
+        order = np.argsort(np.take_along_axis(keys, top, axis=1), axis=1)[:, ::-1]
+        return np.take_along_axis(top, order, axis=1)
+
+    def sample_many_indices(self, count, size, rng=np.random):
+        if size > self.size:
+            raise ValueError('Cannot take a larger sample than the sheet when replace=False')
+        if size == 1:
+            return self.draw(count, rng).reshape(count, 1)
+
+        return self._top_keys(count, size, rng)
+
+    def sample_balanced_many_indices(self, count, size, rng=np.random, batch=BALANCE_BATCH):
+        if size > self.size:
+            raise ValueError('Cannot take a larger sample than the sheet when replace=False')
+
+        # Draw candidates in batches and keep the balanced ones in order, which
+        # is the same distribution as resampling one pack at a time.
+        chosen = []
+        while len(chosen) < count:
+            needed = count - len(chosen)
+            candidates = self._top_keys(needed * batch, size, rng)
+
+            color_dist = self.color_matrix[candidates].sum(axis=1)
+            balanced = ((color_dist >= BALANCE_MIN) & (color_dist <= BALANCE_MAX)).all(axis=1)
+
+            hits = np.flatnonzero(balanced)[:needed]
+            if len(hits) == needed:
+                self.balance_attempts += int(hits[-1]) + 1
+            else:
+                self.balance_attempts += len(candidates)
+            self.balanced_packs += len(hits)
+
+            chosen.extend(candidates[hits])
+
+        return np.array(chosen)
+
+    def sample_indices(self, size, rng=np.random):
+        return self.sample_many_indices(1, size, rng)[0]
+
+    def sample_balanced_indices(self, size, rng=np.random, batch=BALANCE_BATCH):
+        return self.sample_balanced_many_indices(1, size, rng, batch)[0]
+
+    def sample(self, size, rng=np.random):
+        return self.uuids[self.sample_indices(size, rng)]
+
+    def sample_balanced(self, size, rng=np.random, batch=BALANCE_BATCH):
+        return self.uuids[self.sample_balanced_indices(size, rng, batch)]
@@ -0,0 +1,93 @@
+import bisect
+
+from functools import lru_cache
+
+from constants import SCRYFALL_CACHE_SIZE, SCRYFALL_URL_MAX
+
+
+SEARCH_URL = 'https://scryfall.com/search?q='
+SEARCH_OPTIONS = '&order=set&as=grid'
+
+
+def _clause(start, end):
+    if start == end:
+        return f'cn%3A{start}'
+    if end == start + 1:
+        return f'cn%3A{start}+or+cn%3A{end}'
+
+    return f'%28cn%3E%3D{start}+cn%3C%3D{end}%29'
+
+@lru_cache(maxsize=SCRYFALL_CACHE_SIZE)
+def build_links(mtg_set, ranges, others, max_len=SCRYFALL_URL_MAX):
+    # ranges are merged (start, end) collector numbers and others the numbers
+    # that aren't plain integers, so equal card multisets share one entry.
+    prefix = f'{SEARCH_URL}set%3A{mtg_set}+%28'
+    suffix = f'%29{SEARCH_OPTIONS}'
+
+    clauses = [_clause(start, end) for start, end in ranges]
+    clauses += [f'cn%3A{number}' for number in others]
+
+    links = []
+    query = ''
+    for clause in clauses:
+        if query and len(prefix) + len(query) + len(clause) + 4 + len(suffix) > max_len:
+            links.append(prefix + query + suffix)
+            query = ''
+        query = f'{query}+or+{clause}' if query else clause
+
+    if query or not links:
+        links.append(prefix + query + suffix)
+
+    return links
+
+
+class ScryfallLinks():
+    # Collector numbers of a growing card list, kept as merged ranges so adding
+    # a card only touches its neighbours.
+    def __init__(self, mtg_set, cards=()):
+        self.set = mtg_set.lower()
+        self.starts = []
+        self.ends = []
+        self.others = set()
+        self.count = 0
+        self.links = None
+
+        self.extend(cards)
+
+    def extend(self, cards):
+        for card in cards:
+            self.add(card)
+
+    def add(self, card):
+        self.count += 1
+        number = card['number']
+        if not number.isdigit():
+            if number not in self.others:
+                self.others.add(number)
+                self.links = None
+            return
+
+        number = int(number)
+        i = bisect.bisect_right(self.starts, number) - 1
+        if i >= 0 and self.ends[i] >= number:
+            return
+        self.links = None
+
+        join_left = i >= 0 and self.ends[i] == number - 1
+        join_right = i + 1 < len(self.starts) and self.starts[i + 1] == number + 1
+        if join_left and join_right:
+            self.ends[i] = self.ends.pop(i + 1)
+            self.starts.pop(i + 1)
+        elif join_left:
+            self.ends[i] = number
+        elif join_right:
+            self.starts[i + 1] = number
+        else:
+            self.starts.insert(i + 1, number)
+            self.ends.insert(i + 1, number)
+
+    def urls(self):
+        if self.links is None:
+            self.links = build_links(self.set, tuple(zip(self.starts, self.ends)),
+                                     tuple(sorted(self.others)))
+        return self.links
@@ -0,0 +1,183 @@
+import json
+import mmap
+import numpy as np
+import os
+import struct
+import sys
+
+from constants import MTG_COLORS, SET_PATH
+from sampler import SheetSampler
+
+
+PACK_MAGIC = b'DBPK'
+PACK_VERSION = 4
+PACK_EXT = '.pack'
+
+HEADER = struct.Struct('<4sIIII')
+CARD_DTYPE = np.dtype([('uuid', 'S36'),
+                       ('name_off', '<u4'),
+                       ('name_len', '<u2'),
+                       ('number_off', '<u4'),
+                       ('number_len', '<u2'),
+                       ('colors', 'u1'),
+                       ('rarity', 'u1'),
+                       ('mana_value', 'u1')])
+SHEET_DTYPE = np.dtype([('card', '<u4'), ('weight', '<u4')])
+
+RARITIES = ['common', 'uncommon', 'rare', 'mythic', 'special', 'bonus']
+
+
+def pack_path(json_path):
+    return os.path.splitext(json_path)[0] + PACK_EXT
+
+def _pad(blob):
+    return blob + b'\0' * (-len(blob) % 8)
+
+def encode_colors(colors):
+    mask = 0
+    for i, color in enumerate(MTG_COLORS):
+        if color in colors:
+            mask |= 1 << i
+    return mask
+
+def decode_colors(mask):
+    return [color for i, color in enumerate(MTG_COLORS) if mask & (1 << i)]
+
+COLOR_MASKS = [decode_colors(mask) for mask in range(1 << len(MTG_COLORS))]
+
+def compile_set(json_path, out_path=None):
+    if not out_path:
+        out_path = pack_path(json_path)
+
+    with open(json_path, encoding='UTF-8') as f:
+        set_data = json.load(f)['data']
+
+    cards = set_data['cards']
+    card_ids = {card['uuid']: i for i, card in enumerate(cards)}
+
+    strings = bytearray()
+    card_table = np.zeros(len(cards), dtype=CARD_DTYPE)
+    for i, card in enumerate(cards):
+        name = card['name'].encode('UTF-8')
+        number = card['number'].encode('UTF-8')
+
+        card_table[i] = (card['uuid'].encode('ascii'),
+                         len(strings), len(name),
+                         len(strings) + len(name), len(number),
+                         encode_colors(card['colors']),
+                         RARITIES.index(card.get('rarity', 'common')),
+                         int(card.get('manaValue', card.get('convertedManaCost', 0))))
+        strings += name + number
+
+    meta = {'boosters': [], 'sheets': {}}
+    sheet_rows = []
+    alias_probs = []
+    aliases = []
+    if 'booster' in set_data:
+        booster_info = set_data['booster']['default']
+        meta['boosters'] = [{'contents': b['contents'], 'weight': b['weight']}
+                            for b in booster_info['boosters']]
+
+        for sheet, sheet_info in booster_info['sheets'].items():
+            meta['sheets'][sheet] = {'foil': sheet_info['foil'],
+                                     'balanceColors': sheet_info.get('balanceColors', False),
+                                     'start': len(sheet_rows),
+                                     'count': len(sheet_info['cards'])}
+            for uuid, weight in sheet_info['cards'].items():
+                sheet_rows.append((card_ids[uuid], weight))
+
+            # Alias tables are stored with the sheet so loading a set doesn't rebuild them.
+            prob, alias = SheetSampler.build_alias(np.array(list(sheet_info['cards'].values()),
+                                                            dtype=float))
+            alias_probs.append(prob)
+            aliases.append(alias)
+
+    sheet_table = np.array(sheet_rows, dtype=SHEET_DTYPE)
+    alias_prob_table = np.concatenate(alias_probs or [[]]).astype('<f8')
+    alias_table = np.concatenate(aliases or [[]]).astype('<u4')
+    meta_blob = json.dumps(meta, separators=(',', ':')).encode('UTF-8')
+
+    with open(out_path, 'wb') as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, len(cards),
+                            len(strings), len(meta_blob)))
+        f.write(b'\0' * (-HEADER.size % 8))
+        f.write(_pad(card_table.tobytes()))
+        f.write(_pad(bytes(strings)))
+        f.write(_pad(meta_blob))
+        f.write(sheet_table.tobytes())
+        f.write(alias_prob_table.tobytes())
+        f.write(alias_table.tobytes())
+
+    return out_path
+
+
+class SetPack():
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_cards, strings_len, meta_len = HEADER.unpack_from(self.buffer)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f'{path} is not a version {PACK_VERSION} set pack.')
+
+        offset = HEADER.size + (-HEADER.size % 8)
+        self.card_table = np.frombuffer(self.buffer, dtype=CARD_DTYPE,
+                                        count=n_cards, offset=offset)
+        offset += self.card_table.nbytes + (-self.card_table.nbytes % 8)
+
+        self.strings = self.buffer[offset:offset + strings_len]
+        offset += strings_len + (-strings_len % 8)
+
+        self.meta = json.loads(self.buffer[offset:offset + meta_len])
+        offset += meta_len + (-meta_len % 8)
+
+        n_rows = sum(sheet['count'] for sheet in self.meta['sheets'].values())
+        self.sheet_table = np.frombuffer(self.buffer, dtype=SHEET_DTYPE,
+                                         count=n_rows, offset=offset)
+        offset += self.sheet_table.nbytes
+
+        self.alias_prob_table = np.frombuffer(self.buffer, dtype='<f8', count=n_rows, offset=offset)
+        offset += self.alias_prob_table.nbytes
+        self.alias_table = np.frombuffer(self.buffer, dtype='<u4', count=n_rows, offset=offset)
+
+    def cards(self):
+        strings = self.strings
+
+        cards = []
+        for (uuid, name_off, name_len, number_off, number_len,
+             colors, rarity, mana_value) in self.card_table.tolist():
+            cards.append({'uuid': uuid.decode('ascii'),
+                          'name': strings[name_off:name_off + name_len].decode('UTF-8'),
+                          'number': strings[number_off:number_off + number_len].decode('UTF-8'),
+                          'colors': COLOR_MASKS[colors],
+                          'rarity': RARITIES[rarity],
+                          'manaValue': mana_value})
+        return cards
+
+    def booster_info(self):
+        uuids = self.card_table['uuid']
+
+        sheets = {}
+        for sheet, sheet_meta in self.meta['sheets'].items():
+            start, end = sheet_meta['start'], sheet_meta['start'] + sheet_meta['count']
+            rows = self.sheet_table[start:end]
+            sheet_uuids = uuids[rows['card']].tolist()
+            sheets[sheet] = {'foil': sheet_meta['foil'],
+                             'balanceColors': sheet_meta['balanceColors'],
+                             'cards': {u.decode('ascii'): w
+                                       for u, w in zip(sheet_uuids, rows['weight'].tolist())},
+                             'alias': (self.alias_prob_table[start:end],
+                                       self.alias_table[start:end].astype(np.intp))}
+
+        return {'boosters': self.meta['boosters'], 'sheets': sheets}
+
+
+if __name__ == '__main__':
+    set_dir = SET_PATH
+    if len(sys.argv) > 1:
+        set_dir = sys.argv[1]
+
+    for filename in sorted(os.listdir(set_dir)):
+        if filename.endswith('.json'):
+            out_path = compile_set(f'{set_dir}/{filename}')
+            print(f'{filename} -> {os.path.basename(out_path)}')
@@ -0,0 +1,233 @@
+import argparse
+import bz2
+import gzip
+import json
+import lzma
+import os
+import requests
+import tarfile
+import zipfile
+
+from catalog import SetCatalog, get_catalog
+from constants import FORMATS_PATH, SET_PATH, SET_SOURCE, SUPPORTED_FORMATS
+from setpack import compile_set, pack_path
+
+
+DECOMPRESSORS = {'.gz': gzip.decompress, '.bz2': bz2.decompress, '.xz': lzma.decompress}
+CARD_FIELDS = ('uuid', 'name', 'number', 'colors')
+
+
+def _set_code(filename):
+    return os.path.basename(filename).split('.')[0].upper()
+
+def _decompress(filename, blob):
+    ext = os.path.splitext(filename)[1]
+    if ext in DECOMPRESSORS:
+        return DECOMPRESSORS[ext](blob)
+    return blob
+
+def read_archive(path, code):
+    # Mirrors of MTGJSON ship sets either one file per set or bundled in an archive.
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if _set_code(name) == code:
+                    return _decompress(name, archive.read(name))
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            for member in archive:
+                if member.isfile() and _set_code(member.name) == code:
+                    return _decompress(member.name, archive.extractfile(member).read())
+
+    return None
+
+def archive_codes(path):
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+    else:
+        with tarfile.open(path) as archive:
+            names = [member.name for member in archive if member.isfile()]
+
+    return sorted({_set_code(name) for name in names if '.json' in name})
+
+def _local_path(source):
+    if source.startswith('file://'):
+        return source[len('file://'):]
+    return source
+
+def source_codes(source):
+    source = _local_path(source)
+    if source.startswith(('http://', 'https://')):
+        raise ValueError('Remote sources can only be read one set at a time.')
+    if os.path.isdir(source):
+        return sorted({_set_code(name) for name in os.listdir(source) if '.json' in name})
+    return archive_codes(source)
+
+def read_set(source, code):
+    code = code.upper()
+
+    if source.startswith(('http://', 'https://')):
+        response = requests.get(f'{source}/{code}.json.xz', timeout=60)
+        response.raise_for_status()
+        return json.loads(lzma.decompress(response.content))
+
+    source = _local_path(source)
+    blob = None
+    if os.path.isdir(source):
+        for ext in ('.json', '.json.xz', '.json.gz', '.json.bz2'):
+            path = f'{source}/{code}{ext}'
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    blob = _decompress(path, f.read())
+                break
+    else:
+        blob = read_archive(source, code)
+
+    if blob is None:
+        raise ValueError(f'{code} not found in {source}.')
+
+    return json.loads(blob)
+
+def validate_set(set_data):
+    errors = []
+    cards = set_data.get('cards')
+    if not cards:
+        return ['set has no cards']
+
+    uuids = set()
+    for card in cards:
+        missing = [field for field in CARD_FIELDS if field not in card]
+        if missing:
+            errors.append(f'card {card.get("uuid", "?")} is missing {", ".join(missing)}')
+        uuids.add(card.get('uuid'))
+
+    booster_info = set_data.get('booster', {}).get('default')
+    if not booster_info:
+        return errors + ['set has no booster.default']
+
+    sheets = booster_info.get('sheets', {})
+    for sheet, sheet_info in sheets.items():
+        sheet_cards = sheet_info.get('cards')
+        if not sheet_cards:
+            errors.append(f'sheet {sheet} has no cards')
+            continue
+        if 'foil' not in sheet_info:
+            errors.append(f'sheet {sheet} has no foil flag')
+
+        unknown = [uuid for uuid in sheet_cards if uuid not in uuids]
+        if unknown:
+            errors.append(f'sheet {sheet} has {len(unknown)} unknown cards')
+        if any(weight <= 0 for weight in sheet_cards.values()):
+            errors.append(f'sheet {sheet} has non-positive weights')
+
+    boosters = booster_info.get('boosters')
+    if not boosters:
+        errors.append('booster.default has no boosters')
+    for i, booster in enumerate(boosters or []):
+        if booster.get('weight', 0) <= 0:
+            errors.append(f'booster {i} has no weight')
+        for sheet, count in booster.get('contents', {}).items():
+            if sheet not in sheets:
+                errors.append(f'booster {i} uses missing sheet {sheet}')
+            elif count > len(sheets[sheet].get('cards') or {}):
+                errors.append(f'booster {i} takes {count} cards from the smaller sheet {sheet}')
+
+    return errors
+
+def prepare_set(source, code, set_dir=SET_PATH):
+    # Runs in a worker process: fetch, validate, then write the set and its
+    # compiled pack, which stores every sheet's alias table. Loading the pack
+    # back checks it and leaves the catalog, its samplers and the name index
+    # cached in this worker. Other processes load the stored alias tables and
+    # build the name index on their first name lookup.
+    code = code.upper()
+    set_json = read_set(source, code)
+
+    errors = validate_set(set_json.get('data', {}))
+    if errors:
+        raise ValueError(f'{code}: ' + '; '.join(errors[:5]))
+
+    json_path = f'{set_dir}/{code}.json'
+    with open(f'{json_path}.tmp', 'w', encoding='UTF-8') as f:
+        json.dump(set_json, f)
+    os.replace(f'{json_path}.tmp', json_path)
+
+    compiled = pack_path(json_path)
+    compile_set(json_path, f'{compiled}.tmp')
+    os.replace(f'{compiled}.tmp', compiled)
+
+    if set_dir == SET_PATH:
+        catalog = get_catalog(code)
+    else:
+        catalog = SetCatalog(code, *SetCatalog.load_file(compiled), None)
+    for sheet in catalog.booster_info['sheets']:
+        catalog.sheet_sampler(sheet)
+    catalog.name_lookup()
+
+    return {'code': code,
+            'name': set_json['data'].get('name', code),
+            'cards': len(catalog.cards),
+            'sheets': len(catalog.booster_info['sheets'])}
+
+def saved_formats(path=FORMATS_PATH):
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding='UTF-8') as f:
+        return json.load(f)
+
+def write_formats(formats, path=FORMATS_PATH):
+    with open(f'{path}.tmp', 'w', encoding='UTF-8') as f:
+        json.dump(formats, f, indent=2)
+    os.replace(f'{path}.tmp', path)
+
+def load_formats(path=FORMATS_PATH):
+    # Removed formats are saved as False so built-in ones stay removed.
+    for code, icon_url in saved_formats(path).items():
+        if icon_url is False:
+            SUPPORTED_FORMATS.pop(code, None)
+        else:
+            SUPPORTED_FORMATS[code] = icon_url
+
+def register_format(code, icon_url=None, path=FORMATS_PATH):
+    SUPPORTED_FORMATS[code] = icon_url
+
+    formats = saved_formats(path)
+    formats[code] = icon_url
+    write_formats(formats, path)
+
+def unregister_format(code, path=FORMATS_PATH):
+    SUPPORTED_FORMATS.pop(code, None)
+
+    formats = saved_formats(path)
+    formats[code] = False
+    write_formats(formats, path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingest MTGJSON set files as draft formats.')
+    parser.add_argument('command', choices=['list', 'validate', 'ingest'])
+    parser.add_argument('codes', nargs='*')
+    parser.add_argument('--source', default=SET_SOURCE,
+                        help='MTGJSON mirror URL, local directory or archive')
+    parser.add_argument('--set-dir', default=SET_PATH)
+    parser.add_argument('--icon', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        print(' '.join(source_codes(args.source)))
+    else:
+        codes = [code.upper() for code in args.codes] or source_codes(args.source)
+        for code in codes:
+            try:
+                if args.command == 'validate':
+                    errors = validate_set(read_set(args.source, code).get('data', {}))
+                    print(f'{code}: {"; ".join(errors) if errors else "ok"}')
+                else:
+                    info = prepare_set(args.source, code, args.set_dir)
+                    register_format(code, args.icon)
+                    print(f'{code}: {info["name"]}, {info["cards"]} cards, '
+                          f'{info["sheets"]} sheets')
+            except (OSError, ValueError) as e:
+                print(e)
@@ -0,0 +1,596 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import time
+
+from booster import Booster
+from cardpool import CardPool, mana_value
+from constants import DRAFT_WORKERS, HASH_REPLICAS, POD_RECOVERIES, WORKER_TIMEOUT
+from drafter import BotAdapter
+from engine import PlayerAdapter, Pod
+from journal import MemoryJournal, restore_pod
+from timerwheel import TimerWheel
+
+
+SEAT_CARD_FIELDS = ('uuid', 'name', 'number', 'colors', 'rarity', 'is_foil')
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(str(key).encode('UTF-8')).digest()[:8], 'big')
+
+def _slim(cards):
+    # manaValue is resolved here since older sets only have convertedManaCost.
+    return [{**{field: card.get(field) for field in SEAT_CARD_FIELDS},
+             'manaValue': mana_value(card)} for card in cards]
+
+def seat_state(seat, adapter):
+    # Only the pool cards the gateway hasn't seen yet are sent.
+    pool_from = adapter.pool_sent
+    adapter.pool_sent = len(seat.pool)
+
+    curr_pack = None
+    if seat.curr_pack:
+        curr_pack = {'draft_round': seat.curr_pack.draft_round,
+                     'cards': _slim(seat.curr_pack.cards)}
+
+    return {'curr_pack': curr_pack,
+            'pool': _slim(seat.pool[pool_from:]),
+            'pool_from': pool_from,
+            'num_picks': seat.num_picks,
+            'max_picks': seat.max_picks,
+            'curr_round': seat.curr_round,
+            'sub_round': seat.sub_round,
+            'done': seat.done}
+
+
+class HashRing():
+    def __init__(self, nodes=(), replicas=HASH_REPLICAS):
+        self.replicas = replicas
+        self.keys = []
+        self.nodes = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        for i in range(self.replicas):
+            key = _hash(f'{node}:{i}')
+            bisect.insort(self.keys, key)
+            self.nodes[key] = node
+
+    def remove(self, node):
+        for i in range(self.replicas):
+            key = _hash(f'{node}:{i}')
+            self.keys.remove(key)
+            del self.nodes[key]
+
+    def lookup(self, key):
+        i = bisect.bisect(self.keys, _hash(key)) % len(self.keys)
+        return self.nodes[self.keys[i]]
+
+
+# Worker side
+
+class RemoteAdapter(PlayerAdapter):
+    # Forwards a human seat's display updates to the gateway process.
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+        self.pool_sent = 0
+
+    async def show_pack(self, resend=False):
+        self.worker.send_seat(self.seat, self, 'pack', resend)
+
+    async def show_pool(self, resend=False):
+        self.worker.send_seat(self.seat, self, 'pool', resend)
+
+    async def autopicked(self, card_names):
+        self.worker.send({'event': 'autopicked', 'pod_id': self.seat.pod.id,
+                          'seat_id': self.seat.id, 'card_names': card_names})
+
+
+class WorkerJournal(MemoryJournal):
+    # Picks are also forwarded to the gateway, which keeps its own copy of every
+    # pod so the pods of a worker that crashes can be restored on a new one.
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+        self.unsent = []
+
+    def record_pick(self, pod_id, seat_id, card):
+        super().record_pick(pod_id, seat_id, card)
+        if not self.unsent:
+            asyncio.get_running_loop().call_soon(self.worker.flush_picks)
+        self.unsent.append((pod_id, seat_id, card['uuid'], bool(card['is_foil'])))
+
+
+class Worker():
+    def __init__(self, conn, worker_id):
+        self.conn = conn
+        self.id = worker_id
+        self.pods = {}
+        self.watchers = {}
+        self.journal = WorkerJournal(self)
+        self.timer_wheel = TimerWheel()
+        self.inbox = asyncio.Queue()
+        self.logger = logging.getLogger('discord')
+
+    def send(self, msg):
+        # Picks go out first, so the gateway's copy is never behind what it is told.
+        self.flush_picks()
+        self.conn.send(msg)
+
+    def flush_picks(self):
+        if self.journal.unsent:
+            self.conn.send({'event': 'picks', 'picks': self.journal.unsent})
+            self.journal.unsent = []
+
+    def send_seat(self, seat, adapter, view, resend=False):
+        self.send({'event': 'seat', 'pod_id': seat.pod.id, 'seat_id': seat.id,
+                   'view': view, 'resend': resend, 'state': seat_state(seat, adapter)})
+
+    def reply(self, msg, result):
+        self.send({'reply': msg['req'], 'result': result})
+
+    def on_readable(self):
+        while self.conn.poll():
+            self.inbox.put_nowait(self.conn.recv())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.conn.fileno(), self.on_readable)
+        self.timer_wheel.start()
+
+        # Messages are handled one at a time so picks apply in the order they were sent.
+        while True:
+            msg = await self.inbox.get()
+            if msg['op'] == 'stop':
+                break
+            try:
+                await getattr(self, f'op_{msg["op"]}')(msg)
+            except Exception:
+                self.logger.exception(f'Worker {self.id} failed to handle {msg["op"]}')
+                if 'req' in msg:
+                    self.reply(msg, None)
+
+    def adapters(self, mtg_set, seats):
+        adapters = {}
+        for seat_id in seats:
+            if seat_id < 0:
+                adapters[seat_id] = BotAdapter(mtg_set)
+            else:
+                adapters[seat_id] = RemoteAdapter(self)
+        return adapters
+
+    def find_seat(self, msg):
+        pod = self.pods.get(msg['pod_id'])
+        if not pod:
+            return None
+
+        for seat in pod.seats:
+            if seat.id == msg['seat_id']:
+                return seat
+        return None
+
+    def add_pod(self, pod):
+        self.pods[pod.id] = pod
+        self.watchers[pod.id] = asyncio.create_task(self.watch_pod(pod))
+
+    async def watch_pod(self, pod):
+        await pod.finished()
+
+        del self.pods[pod.id]
+        del self.watchers[pod.id]
+        self.journal.finish_pod(pod.id)
+        self.send({'event': 'pod_done', 'pod_id': pod.id})
+
+    async def op_create_pod(self, msg):
+        pod = Pod(msg['mtg_set'], msg['pod_id'], self.timer_wheel, msg['pick_time'])
+        adapters = self.adapters(msg['mtg_set'], msg['seats'])
+        for seat_id in msg['seats']:
+            pod.add_seat(seat_id, adapters[seat_id])
+
+        pod_packs = Booster.generate_pod(msg['mtg_set'], len(msg['seats']))
+        self.journal.record_pod(pod, pod_packs, msg['info'])
+        pod.journal = self.journal
+
+        await pod.start(pod_packs)
+        self.add_pod(pod)
+        self.reply(msg, self.journal.pods[pod.id])
+
+    async def op_import_pod(self, msg):
+        record = msg['record']
+        info = record['info']
+
+        self.journal.load_record(record)
+        pod = await restore_pod(record, self.adapters(info['mtg_set'], info['seats']),
+                                self.timer_wheel, self.journal)
+
+        self.add_pod(pod)
+        self.reply(msg, True)
+
+    async def op_export_pod(self, msg):
+        pod = self.pods.pop(msg['pod_id'], None)
+        if not pod:
+            self.reply(msg, None)
+            return
+
+        self.watchers.pop(pod.id).cancel()
+        for task in pod.tasks:
+            task.cancel()
+        for seat in pod.seats:
+            seat.stop_pick_timer()
+
+        self.reply(msg, self.journal.export(pod.id))
+
+    async def op_pick(self, msg):
+        seat = self.find_seat(msg)
+        if not seat or not seat.curr_pack or not 1 <= msg['card_no'] <= len(seat.curr_pack.cards):
+            self.reply(msg, None)
+            return
+
+        card_name = await seat.pick(msg['card_no'])
+        self.reply(msg, {'card_name': card_name, 'state': seat_state(seat, seat.adapter)})
+        seat.finish_pick()
+
+    async def op_reserve(self, msg):
+        seat = self.find_seat(msg)
+        if seat and seat.curr_pack:
+            seat.reserve(msg['card_no'])
+
+
+def worker_main(conn, worker_id):
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(Worker(conn, worker_id).run())
+
+
+# Gateway side
+
+class RemotePod():
+    def __init__(self, pod_id, mtg_set, worker_id, pick_time):
+        self.id = pod_id
+        self.mtg_set = mtg_set
+        self.worker_id = worker_id
+        self.pick_time = pick_time
+        self.seats = {}
+        self.lock = asyncio.Lock()
+        self.done = asyncio.Event()
+
+        # Copy of the worker's journal record, kept up to date from its pick events.
+        self.record = None
+        self.create_msg = None
+        self.lost = False
+        self.recoveries = 0
+        self.failed = False
+
+    def load_record(self, record):
+        self.record = record
+
+    async def finished(self):
+        await self.done.wait()
+
+
+class RemoteSeat():
+    # Gateway mirror of a worker seat, with the attributes the cog and
+    # DiscordAdapter read from an engine DraftPlayer.
+    def __init__(self, coordinator, pod, seat_id, adapter):
+        self.coordinator = coordinator
+        self.pod = pod
+        self.id = seat_id
+        self.mtg_set = pod.mtg_set
+
+        self.curr_pack = None
+        self.pool = CardPool()
+        self.reserved = []
+        self.num_picks = 0
+        self.max_picks = 1
+        self.curr_round = 1
+        self.sub_round = 0
+        self.done = False
+
+        self.adapter = adapter
+        self.adapter.attach(self)
+
+    def update(self, state):
+        self.curr_pack = None
+        if state['curr_pack']:
+            self.curr_pack = Booster(self.mtg_set, draft_round=state['curr_pack']['draft_round'],
+                                     cards=state['curr_pack']['cards'])
+            # Pass-to-display on the gateway counts from when a new pack arrives here.
+            if (state['curr_round'], state['sub_round']) != (self.curr_round, self.sub_round):
+                self.curr_pack.passed_at = time.perf_counter()
+        else:
+            self.reserved = []
+
+        self.pool.extend(state['pool'][len(self.pool) - state['pool_from']:])
+        self.num_picks = state['num_picks']
+        self.max_picks = state['max_picks']
+        self.curr_round = state['curr_round']
+        self.sub_round = state['sub_round']
+        self.done = state['done']
+
+    async def pick(self, card_no):
+        async with self.pod.lock:
+            result = await self.coordinator.request(self.pod.worker_id,
+                                                    {'op': 'pick', 'pod_id': self.pod.id,
+                                                     'seat_id': self.id, 'card_no': card_no},
+                                                    self.picked)
+        if not result:
+            return None
+
+        return result['card_name']
+
+    def reserve(self, card_no):
+        max_reserve = 1
+        if self.mtg_set in ('CMR', 'BBD', '2XM'):
+            max_reserve = 2
+
+        if len(self.reserved) >= max_reserve:
+            self.reserved.pop(0)
+        self.reserved.append(self.curr_pack.cards[card_no-1])
+
+        self.coordinator.send(self.pod.worker_id, {'op': 'reserve', 'pod_id': self.pod.id,
+                                                   'seat_id': self.id, 'card_no': card_no})
+
+        return [card['name'] for card in self.reserved]
+
+    def picked(self, result):
+        self.update(result['state'])
+
+    def finish_pick(self):
+        pass
+
+    async def show_pack(self, resend=False):
+        await self.adapter.show_pack(resend)
+
+    async def show_pool(self, resend=False):
+        await self.adapter.show_pool(resend)
+
+    def format_cardpool(self, order='pick'):
+        return self.pool.format(order)
+
+
+class ShardCoordinator():
+    def __init__(self, workers=DRAFT_WORKERS):
+        self.worker_ids = list(range(workers))
+        self.ring = HashRing(self.worker_ids)
+        self.workers = {}
+        self.pods = {}
+        self.requests = {}
+        self.next_req = 0
+        self.ctx = multiprocessing.get_context('spawn')
+        self.logger = logging.getLogger('discord')
+
+    def start(self):
+        for worker_id in self.worker_ids:
+            if worker_id not in self.workers:
+                self.spawn(worker_id)
+
+    def spawn(self, worker_id):
+        conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(target=worker_main, args=(child_conn, worker_id),
+                                   name=f'draft_worker_{worker_id}', daemon=True)
+        process.start()
+        child_conn.close()
+
+        self.workers[worker_id] = (process, conn)
+        asyncio.get_running_loop().add_reader(conn.fileno(), self.on_readable, worker_id)
+
+    async def stop_worker(self, worker_id):
+        process, conn = self.workers.pop(worker_id)
+        asyncio.get_running_loop().remove_reader(conn.fileno())
+        try:
+            conn.send({'op': 'stop'})
+        except OSError:
+            process.kill()
+        await asyncio.get_running_loop().run_in_executor(None, process.join)
+        conn.close()
+
+    async def shutdown(self):
+        for worker_id in list(self.workers):
+            await self.stop_worker(worker_id)
+
+    def send(self, worker_id, msg):
+        if worker_id not in self.workers:
+            return False
+
+        try:
+            self.workers[worker_id][1].send(msg)
+        except OSError:
+            self.worker_died(worker_id)
+            return False
+        return True
+
+    async def request(self, worker_id, msg, apply=None, timeout=WORKER_TIMEOUT):
+        # Resolves to None if the worker fails the request, dies or stops answering.
+        self.next_req += 1
+        msg['req'] = self.next_req
+        future = asyncio.get_running_loop().create_future()
+        self.requests[msg['req']] = (future, worker_id, apply)
+
+        process = self.workers.get(worker_id, (None, None))[0]
+        try:
+            if not self.send(worker_id, msg):
+                return None
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            # A worker that stops answering is treated as crashed.
+            self.logger.error(f'Draft worker {worker_id} did not answer {msg["op"]} '
+                              f'within {timeout}s, killing it')
+            if process and self.workers.get(worker_id, (None, None))[0] is process:
+                process.kill()
+            return None
+        finally:
+            self.requests.pop(msg['req'], None)
+
+    def on_readable(self, worker_id):
+        conn = self.workers[worker_id][1]
+        try:
+            while conn.poll():
+                self.dispatch(conn.recv())
+        except (EOFError, OSError):
+            self.worker_died(worker_id)
+
+    def worker_died(self, worker_id):
+        if worker_id not in self.workers:
+            return
+
+        process, conn = self.workers.pop(worker_id)
+        asyncio.get_running_loop().remove_reader(conn.fileno())
+        conn.close()
+        process.kill()
+        self.logger.error(f'Draft worker {worker_id} exited, restoring its pods on a new one')
+
+        for req, (future, req_worker, _) in list(self.requests.items()):
+            if req_worker == worker_id:
+                del self.requests[req]
+                if not future.done():
+                    future.set_result(None)
+
+        lost = [pod for pod in self.pods.values() if pod.worker_id == worker_id]
+        for pod in lost:
+            pod.lost = True
+
+        self.spawn(worker_id)
+        asyncio.create_task(self.recover_pods(worker_id, process, lost))
+
+    async def recover_pods(self, worker_id, process, lost):
+        await asyncio.get_running_loop().run_in_executor(None, process.join)
+
+        # Pods are restored from the gateway's copy of their record, or created
+        # again if the worker died before sending one.
+        for pod in lost:
+            async with pod.lock:
+                if not pod.lost or pod.done.is_set():
+                    continue
+
+                pod.lost = False
+                pod.recoveries += 1
+                if pod.recoveries > POD_RECOVERIES:
+                    restored = None
+                elif pod.record:
+                    restored = await self.request(worker_id, {'op': 'import_pod',
+                                                              'record': pod.record})
+                else:
+                    restored = await self.request(worker_id, dict(pod.create_msg),
+                                                  pod.load_record)
+
+                if not restored and not pod.lost:
+                    self.end_pod(pod)
+
+    def end_pod(self, pod):
+        if pod.done.is_set():
+            return
+
+        self.logger.error(f'Pod {pod.id} could not be restored on draft worker {pod.worker_id}')
+        self.pods.pop(pod.id, None)
+        pod.failed = True
+        pod.done.set()
+
+    def dispatch(self, msg):
+        if 'reply' in msg:
+            future, _, apply = self.requests.pop(msg['reply'], (None, None, None))
+            # Results are applied here, in pipe order, so events sent after the
+            # reply aren't overwritten when the caller resumes.
+            if apply and msg['result']:
+                apply(msg['result'])
+            if future and not future.done():
+                future.set_result(msg['result'])
+            return
+
+        if msg['event'] == 'picks':
+            for pod_id, seat_id, uuid, foil in msg['picks']:
+                pod = self.pods.get(pod_id)
+                if pod and pod.record:
+                    pod.record['picks'].setdefault(seat_id, []).append((uuid, foil))
+            return
+
+        pod = self.pods.get(msg['pod_id'])
+        if not pod:
+            return
+
+        if msg['event'] == 'pod_done':
+            del self.pods[pod.id]
+            pod.done.set()
+            return
+
+        seat = pod.seats.get(msg['seat_id'])
+        if msg['event'] == 'seat':
+            seat.update(msg['state'])
+            if msg['view'] == 'pack':
+                asyncio.create_task(seat.show_pack(msg['resend']))
+            else:
+                asyncio.create_task(seat.show_pool(msg['resend']))
+        elif msg['event'] == 'autopicked':
+            asyncio.create_task(seat.adapter.autopicked(msg['card_names']))
+
+    async def create_pod(self, pod_id, mtg_set, seating, pick_time, info=None):
+        # seating is a list of (seat_id, adapter); bots use negative ids and no adapter.
+        worker_id = self.ring.lookup(pod_id)
+        pod = RemotePod(pod_id, mtg_set, worker_id, pick_time)
+        for seat_id, adapter in seating:
+            if adapter:
+                pod.seats[seat_id] = RemoteSeat(self, pod, seat_id, adapter)
+        self.pods[pod_id] = pod
+
+        pod.create_msg = {'op': 'create_pod', 'pod_id': pod_id, 'mtg_set': mtg_set,
+                          'pick_time': pick_time, 'seats': [seat_id for seat_id, _ in seating],
+                          'info': info or {}}
+        async with pod.lock:
+            created = await self.request(worker_id, dict(pod.create_msg), pod.load_record)
+            # Pods lost with their worker are created again by recover_pods.
+            if not created and not pod.lost:
+                self.end_pod(pod)
+        return pod
+
+    async def move_pod(self, pod, worker_id):
+        async with pod.lock:
+            record = await self.request(pod.worker_id, {'op': 'export_pod', 'pod_id': pod.id},
+                                        pod.load_record)
+            if record is None:
+                return
+
+            pod.worker_id = worker_id
+            await self.request(worker_id, {'op': 'import_pod', 'record': record})
+
+    async def rebalance(self):
+        for pod in list(self.pods.values()):
+            worker_id = self.ring.lookup(pod.id)
+            if worker_id != pod.worker_id:
+                await self.move_pod(pod, worker_id)
+
+    async def restart_worker(self, worker_id):
+        moved = [pod for pod in self.pods.values() if pod.worker_id == worker_id]
+
+        # Park the worker's pods on the rest of the ring while it restarts, then
+        # move back whatever hashes to it again.
+        if len(self.worker_ids) > 1:
+            self.ring.remove(worker_id)
+            for pod in moved:
+                await self.move_pod(pod, self.ring.lookup(pod.id))
+
+            await self.stop_worker(worker_id)
+            self.spawn(worker_id)
+
+            self.ring.add(worker_id)
+            await self.rebalance()
+            return
+
+        # With a single worker, hold its pods' state here across the restart.
+        for pod in moved:
+            await pod.lock.acquire()
+        try:
+            records = [await self.request(worker_id, {'op': 'export_pod', 'pod_id': pod.id},
+                                          pod.load_record)
+                       for pod in moved]
+
+            await self.stop_worker(worker_id)
+            self.spawn(worker_id)
+
+            for record in records:
+                if record:
+                    await self.request(worker_id, {'op': 'import_pod', 'record': record})
+        finally:
+            for pod in moved:
+                pod.lock.release()
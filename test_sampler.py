@@ -0,0 +1,126 @@
+import itertools
+import numpy as np
+
+from constants import MTG_COLORS
+from sampler import BALANCE_MAX, BALANCE_MIN, SheetSampler
+
+
+WEIGHTS = [1, 2, 3, 5, 8, 13, 1, 4]
+
+
+def weighted_sheet(weights=WEIGHTS):
+    return {f'card-{i}': weight for i, weight in enumerate(weights)}
+
+def chi_square(observed, expected):
+    observed = np.asarray(observed, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    return float(((observed - expected) ** 2 / expected).sum())
+
+def chi_square_limit(dof, z=3.09):
+    # Wilson-Hilferty approximation of the chi-square quantile; z=3.09 is the 99.9th percentile.
+    h = 2 / (9 * dof)
+    return dof * (1 - h + z * h ** 0.5) ** 3
+
+def homogeneity(first, second):
+    # Two-sample chi-square on count vectors, skipping cells neither sample hit.
+    table = np.array([first, second], dtype=float)
+    table = table[:, table.sum(axis=0) > 0]
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / table.sum()
+    return chi_square(table, expected), table.shape[1] - 1
+
+def ordered_probability(weights, draw):
+    # Chance of drawing exactly this sequence one card at a time without replacement.
+    remaining = float(sum(weights))
+    p = 1.0
+    for i in draw:
+        p *= weights[i] / remaining
+        remaining -= weights[i]
+    return p
+
+
+def test_draw_matches_weights():
+    sampler = SheetSampler(weighted_sheet())
+    draws = sampler.draw(200000, np.random.default_rng(1))
+
+    observed = np.bincount(draws, minlength=len(WEIGHTS))
+    expected = np.array(WEIGHTS) / sum(WEIGHTS) * len(draws)
+    assert chi_square(observed, expected) < chi_square_limit(len(WEIGHTS) - 1)
+
+def test_single_card_samples_use_draw():
+    sampler = SheetSampler(weighted_sheet())
+    indices = sampler.sample_many_indices(50000, 1, np.random.default_rng(2))
+    assert indices.shape == (50000, 1)
+
+    observed = np.bincount(indices.ravel(), minlength=len(WEIGHTS))
+    expected = np.array(WEIGHTS) / sum(WEIGHTS) * len(indices)
+    assert chi_square(observed, expected) < chi_square_limit(len(WEIGHTS) - 1)
+
+def test_top_keys_are_distinct():
+    sampler = SheetSampler(weighted_sheet())
+    indices = sampler.sample_many_indices(5000, 5, np.random.default_rng(3))
+    assert indices.shape == (5000, 5)
+    assert all(len(set(row)) == 5 for row in indices.tolist())
+
+def test_top_keys_match_ordered_draws():
+    # Every ordered draw of 3 from 6 cards, against its exact probability.
+    weights = WEIGHTS[:6]
+    sampler = SheetSampler(weighted_sheet(weights))
+    indices = sampler.sample_many_indices(100000, 3, np.random.default_rng(4))
+
+    draws = list(itertools.permutations(range(len(weights)), 3))
+    counts = dict.fromkeys(draws, 0)
+    for row in map(tuple, indices.tolist()):
+        counts[row] += 1
+
+    observed = [counts[draw] for draw in draws]
+    expected = [ordered_probability(weights, draw) * len(indices) for draw in draws]
+    assert chi_square(observed, expected) < chi_square_limit(len(draws) - 1)
+
+def test_top_keys_positions_match_choice():
+    size = 4
+    packs = 20000
+    sampler = SheetSampler(weighted_sheet())
+    indices = sampler.sample_many_indices(packs, size, np.random.default_rng(5))
+
+    p = np.array(WEIGHTS) / sum(WEIGHTS)
+    state = np.random.RandomState(5)
+    reference = np.array([state.choice(len(WEIGHTS), size, replace=False, p=p)
+                          for _ in range(packs)])
+
+    for position in range(size):
+        statistic, dof = homogeneity(np.bincount(indices[:, position], minlength=len(WEIGHTS)),
+                                     np.bincount(reference[:, position], minlength=len(WEIGHTS)))
+        assert statistic < chi_square_limit(dof), f'position {position}'
+
+def test_balanced_packs_stay_in_bounds():
+    sheet = {}
+    colors = []
+    for color in MTG_COLORS:
+        for i in range(8):
+            sheet[f'{color}-{i}'] = 1 + i % 3
+            colors.append([color])
+    for i in range(6):
+        sheet[f'multi-{i}'] = 2
+        colors.append(['W', 'U'] if i % 2 else [])
+
+    sampler = SheetSampler(sheet, colors)
+    indices = sampler.sample_balanced_many_indices(3000, 10, np.random.default_rng(6))
+    assert indices.shape == (3000, 10)
+    assert all(len(set(row)) == 10 for row in indices.tolist())
+
+    color_dist = sampler.color_matrix[indices].sum(axis=1)
+    assert (color_dist >= BALANCE_MIN).all()
+    assert (color_dist <= BALANCE_MAX).all()
+    assert sampler.balanced_packs == 3000
+    assert sampler.balance_attempts >= 3000
+
+def test_balanced_single_pack():
+    sheet = {f'{color}-{i}': 1 for color in MTG_COLORS for i in range(3)}
+    colors = [[color] for color in MTG_COLORS for _ in range(3)]
+    sampler = SheetSampler(sheet, colors)
+
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        pack = sampler.sample_balanced(9, rng)
+        counts = [sum(uuid.startswith(color) for uuid in pack) for color in MTG_COLORS]
+        assert min(counts) >= BALANCE_MIN and max(counts) <= BALANCE_MAX
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import math
+
+from constants import TIMER_TICK
+
+
+class Timer():
+    __slots__ = ('expires', 'callback', 'cancelled')
+
+    def __init__(self, expires, callback):
+        self.expires = expires
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel():
+    # Hierarchical timing wheel: level n has `slots` buckets of slots**n ticks each.
+    # A single task advances it, so the cost per tick doesn't grow with timer count.
+    def __init__(self, tick=TIMER_TICK, slots=64, levels=4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.now = 0
+        self.task = None
+        self.logger = logging.getLogger('discord')
+
+        self.scheduled = 0
+        self.expired = 0
+
+    def start(self):
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.run(), name='timer_wheel')
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+
+    def schedule(self, delay, callback):
+        ticks = max(1, math.ceil(delay / self.tick))
+        ticks = min(ticks, self.slots ** self.levels - 1)
+
+        timer = Timer(self.now + ticks, callback)
+        self._place(timer)
+        self.scheduled += 1
+        return timer
+
+    def _place(self, timer):
+        remaining = timer.expires - self.now
+        for level in range(self.levels):
+            if remaining < self.slots ** (level + 1):
+                slot = (timer.expires // self.slots ** level) % self.slots
+                self.wheels[level][slot].append(timer)
+                return
+
+    def advance(self):
+        self.now += 1
+
+        # Move timers down from coarser wheels as their bucket comes due.
+        for level in range(self.levels - 1, 0, -1):
+            if self.now % self.slots ** level == 0:
+                slot = (self.now // self.slots ** level) % self.slots
+                bucket = self.wheels[level][slot]
+                self.wheels[level][slot] = []
+                for timer in bucket:
+                    if not timer.cancelled:
+                        self._place(timer)
+
+        slot = self.now % self.slots
+        bucket = self.wheels[0][slot]
+        self.wheels[0][slot] = []
+        for timer in bucket:
+            if timer.cancelled:
+                continue
+            self.expired += 1
+            try:
+                timer.callback()
+            except Exception:
+                self.logger.exception('Timer callback failed')
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+            # Catch up on ticks missed while the loop was busy.
+            while loop.time() >= next_tick:
+                self.advance()
+                next_tick += self.tick